@@ -0,0 +1,38 @@
+import pytest
+from django.db import transaction
+
+from core.pytest_budgets import budget_names
+
+
+@pytest.fixture(scope='module')
+def budget_routes(django_db_setup, django_db_blocker):
+    from posts.benchmark import sample_objects, site_routes
+    from posts.seeding import Seeder
+
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            Seeder(users=30, posts=300, groups=3, comments=50, follows=60,
+                   seed=1).run()
+            yield {route.name: route
+                   for route in site_routes(sample_objects())}
+            transaction.set_rollback(True)
+
+
+def test_budgets_cover_all_routes(budget_routes):
+    from core.budgets import url_names
+
+    names = url_names({'posts', 'users', 'about'})
+    assert set(budget_names()) == names, (
+        'Бюджеты в budgets.json должны быть у всех адресов '
+        'posts, users и about'
+    )
+    assert set(budget_routes) == names, (
+        'Для каждого адреса posts, users и about нужен Route '
+        'в posts.benchmark.site_routes'
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', budget_names())
+def test_route_within_budget(name, budget_routes, assert_within_budget):
+    assert_within_budget(budget_routes[name])
@@ -0,0 +1,118 @@
+import json
+import os
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import URLResolver, get_resolver, reverse
+
+from .queries import find_trigger
+
+Route = namedtuple(
+    'Route', 'name kwargs user method data',
+    defaults=({}, None, 'get', None),
+)
+
+
+class BudgetExceededError(AssertionError):
+    """Адрес выполнил больше запросов или рендерился дольше бюджета."""
+
+
+def budgets_path():
+    return os.path.join(settings.BASE_DIR, 'budgets.json')
+
+
+def url_names(namespaces, patterns=None, prefix=''):
+    """Полные имена адресов из URLconf в пространствах ``namespaces``."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            namespace = pattern.namespace
+            nested = f'{prefix}{namespace}:' if namespace else prefix
+            names |= url_names(namespaces, pattern.url_patterns, nested)
+        elif pattern.name and prefix.split(':', 1)[0] in namespaces:
+            names.add(f'{prefix}{pattern.name}')
+    return names
+
+
+def load_budgets(path=None):
+    """Бюджеты адресов: имя адреса -> {'queries': ..., 'ms': ...}."""
+    with open(path or budgets_path(), encoding='utf-8') as file:
+        return json.load(file)
+
+
+class QueryLog:
+    """Обёртка для execute_wrapper, запоминающая запросы по порядку."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, find_trigger(ignore=(__file__,))))
+        return execute(sql, params, many, context)
+
+
+def exercise(route):
+    """Выполняет запрос к адресу с пустыми кешами.
+
+    Первый запрос прогревает шаблоны и не учитывается. Перед вторым
+    очищаются кеши: бюджет считается для худшего случая. Запросы
+    выполняются в откатываемой транзакции. Возвращает ответ, время
+    в миллисекундах и выполненные запросы с местом вызова.
+    """
+    client = Client()
+    path = reverse(route.name, kwargs=route.kwargs)
+    send = getattr(client, route.method)
+    if route.user is not None:
+        client.force_login(route.user)
+    with transaction.atomic():
+        send(path, route.data)
+        transaction.set_rollback(True)
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    # Прогрев мог завершить сессию, например на выходе из аккаунта.
+    if route.user is not None:
+        client.force_login(route.user)
+    log = QueryLog()
+    with transaction.atomic():
+        with connection.execute_wrapper(log):
+            started = time.perf_counter()
+            response = send(path, route.data)
+            elapsed = (time.perf_counter() - started) * 1000
+        transaction.set_rollback(True)
+    return response, elapsed, log.queries
+
+
+def check_budget(route, budget, check_time=True, attempts=3):
+    """Падает с BudgetExceededError, если адрес превысил бюджет.
+
+    Время разового запроса шумит (сборка мусора, первый импорт), поэтому
+    превышение времени перепроверяется: бюджет нарушен, только если его
+    превысили все ``attempts`` попыток.
+    """
+    response, elapsed, queries = exercise(route)
+    for _ in range(attempts - 1):
+        if not check_time or elapsed <= budget['ms']:
+            break
+        response, elapsed, queries = exercise(route)
+    problems = []
+    if len(queries) > budget['queries']:
+        problems.append(
+            f'{len(queries)} запросов при бюджете {budget["queries"]}')
+    if check_time and elapsed > budget['ms']:
+        problems.append(
+            f'{elapsed:.0f} мс при бюджете {budget["ms"]} мс')
+    if problems:
+        lines = [f'{route.name} ({response.status_code}): '
+                 + '; '.join(problems)]
+        lines.extend(
+            f'{number}. {trigger}: {sql}'
+            for number, (sql, trigger) in enumerate(queries, start=1)
+        )
+        raise BudgetExceededError('\n'.join(lines))
+    return response, elapsed, queries
@@ -0,0 +1,258 @@
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .timing import record_cache, span
+
+_MISSING = object()
+LOCK_PREFIX = '__twotier_lock__'
+
+
+class TwoTierCache(BaseCache):
+    """Двухуровневый кеш: LRU в памяти процесса перед общим кешем.
+
+    LOCATION — алиас общего кеша (L2) из CACHES: файлового локально
+    или сетевого в бою. L1 хранит недавние значения несколько секунд.
+    Записи L2 с вероятностью, растущей к концу срока, считаются
+    устаревшими чуть раньше (XFetch), а пересчитывает их только тот,
+    кто взял блокировку: остальные получают старое значение. Промах
+    блокирует ключ только в get_or_set — там остальные недолго ждут
+    нового значения; простой get при промахе ничего не блокирует.
+
+    delete() и set() очищают L1 только своего процесса: в остальных
+    старое значение живёт до L1_TIMEOUT секунд. Ключи, которые
+    начинаются с L1_SKIP_PREFIXES, в L1 не попадают и сразу видны
+    всем процессам — для версий и сбрасываемых наборов.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = location
+        self._l1 = OrderedDict()
+        self._l1_lock = threading.Lock()
+        self._l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._l1_timeout = options.get('L1_TIMEOUT', 5)
+        self._l1_skip_prefixes = tuple(options.get('L1_SKIP_PREFIXES', ()))
+        self._stale_timeout = options.get('STALE_TIMEOUT', 60)
+        self._beta = options.get('EARLY_EXPIRATION_BETA', 1.0)
+        self._recompute_time = options.get('RECOMPUTE_TIME', 0.5)
+        self._lock_timeout = options.get('LOCK_TIMEOUT', 5)
+        self._lock_wait = options.get('LOCK_WAIT', 0.5)
+        self._local = threading.local()
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    @property
+    def _recomputing(self):
+        # Ключи, которые пересчитывает этот поток, и начало пересчёта.
+        if not hasattr(self._local, 'recomputing'):
+            self._local.recomputing = {}
+        return self._local.recomputing
+
+    def _use_l1(self, key):
+        return not key.startswith(self._l1_skip_prefixes)
+
+    def _l1_get(self, key):
+        with self._l1_lock:
+            item = self._l1.get(key)
+            if item is None:
+                return _MISSING
+            pickled, expires_at = item
+            if expires_at <= time.time():
+                del self._l1[key]
+                return _MISSING
+            self._l1.move_to_end(key)
+        return pickle.loads(pickled)
+
+    def _l1_set(self, key, value, expires_at):
+        l1_expires_at = time.time() + self._l1_timeout
+        if expires_at is not None:
+            l1_expires_at = min(l1_expires_at, expires_at)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._l1_lock:
+            self._l1[key] = (pickled, l1_expires_at)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, key):
+        with self._l1_lock:
+            self._l1.pop(key, None)
+
+    @staticmethod
+    def _lock_key(key):
+        # Отдельное пространство имён: блокировка не должна совпасть
+        # с ключом, который вызывающий код сам заводит рядом с ключом.
+        return f'{LOCK_PREFIX}:{key}'
+
+    def _acquire(self, key):
+        """Берёт блокировку на пересчёт ключа во всех процессах."""
+        if key in self._recomputing:
+            return True
+        if self.l2.add(self._lock_key(key), True, self._lock_timeout):
+            self._recomputing[key] = time.monotonic()
+            return True
+        return False
+
+    def _release(self, key):
+        # Значение опубликовано: пересчёт окончен, кто бы его ни начал.
+        self._recomputing.pop(key, None)
+        self.l2.delete(self._lock_key(key))
+
+    def _should_recompute(self, expires_at, delta):
+        if expires_at is None:
+            return False
+        jitter = -math.log(1.0 - random.random())
+        return time.time() + delta * self._beta * jitter >= expires_at
+
+    def _wait_for_value(self, key, default):
+        deadline = time.monotonic() + self._lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = self.l2.get(key)
+            if entry is not None:
+                return entry[0]
+        return default
+
+    def _envelope(self, key, value, timeout):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        expires_at = None if timeout is None else time.time() + timeout
+        started = self._recomputing.get(key)
+        delta = self._recompute_time
+        if started is not None:
+            delta = time.monotonic() - started
+        return (value, expires_at, delta), timeout, expires_at
+
+    def _l2_timeout(self, timeout):
+        if timeout is None:
+            return None
+        return timeout + self._stale_timeout
+
+    def get(self, key, default=None, version=None):
+        with span('cache'):
+            value = self._get(key, _MISSING, version)
+        record_cache(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def _get(self, key, default, version, single_flight=False):
+        use_l1 = self._use_l1(key)
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if use_l1:
+            value = self._l1_get(key)
+            if value is not _MISSING:
+                return value
+        entry = self.l2.get(key)
+        if entry is None:
+            if not single_flight or self._acquire(key):
+                return default
+            return self._wait_for_value(key, default)
+        value, expires_at, delta = entry
+        if self._should_recompute(expires_at, delta):
+            if self._acquire(key):
+                return default
+            # Пересчитывает другой процесс: отдаём пока старое значение.
+            return value
+        if use_l1:
+            self._l1_set(key, value, expires_at)
+        return value
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        with span('cache'):
+            value = self._get(key, None, version, single_flight=True)
+        record_cache(value is not None)
+        if value is not None:
+            return value
+        try:
+            if callable(default):
+                default = default()
+        except BaseException:
+            # Пересчёт не удался: остальные не должны ждать блокировку.
+            self._release(self.make_key(key, version=version))
+            raise
+        if default is None:
+            self._release(self.make_key(key, version=version))
+        else:
+            self.set(key, default, timeout=timeout, version=version)
+        return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with span('cache'):
+            self._set(key, value, timeout, version)
+
+    def _set(self, key, value, timeout, version):
+        use_l1 = self._use_l1(key)
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        entry, timeout, expires_at = self._envelope(key, value, timeout)
+        if timeout is not None and timeout <= 0:
+            self._l1_delete(key)
+            self.l2.delete(key)
+        else:
+            self.l2.set(key, entry, self._l2_timeout(timeout))
+            if use_l1:
+                self._l1_set(key, value, expires_at)
+        self._release(key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        use_l1 = self._use_l1(key)
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        entry, timeout, expires_at = self._envelope(key, value, timeout)
+        added = self.l2.add(key, entry, self._l2_timeout(timeout))
+        if added and use_l1:
+            self._l1_set(key, value, expires_at)
+        self._release(key)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        use_l1 = self._use_l1(key)
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        entry = self.l2.get(key)
+        if entry is None:
+            raise ValueError("Key '%s' not found" % key)
+        value, expires_at, recompute_time = entry
+        value += delta
+        timeout = None
+        if expires_at is not None:
+            timeout = max(expires_at - time.time(), 0)
+        self.l2.set(key, (value, expires_at, recompute_time),
+                    self._l2_timeout(timeout))
+        if use_l1:
+            self._l1_set(key, value, expires_at)
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return False
+        self.set(key, value, timeout=timeout, version=version)
+        return True
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._l1_get(key) is not _MISSING or self.l2.has_key(key)
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._l1_delete(key)
+        self.l2.delete(key)
+
+    def clear(self):
+        with self._l1_lock:
+            self._l1.clear()
+        self._recomputing.clear()
+        self.l2.clear()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.routers import sync_replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу в реплики из REPLICA_DATABASES. '
+            'Для локальной проверки чтения с реплик.')
+
+    def handle(self, *args, **options):
+        aliases = sync_replicas()
+        if not aliases:
+            self.stderr.write('REPLICA_DATABASES пуст: копировать некуда.')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлены реплики: {", ".join(aliases)}'))
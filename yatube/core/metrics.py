@@ -0,0 +1,275 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+# Границы корзин гистограмм.
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+HISTOGRAM = 'histogram'
+COUNTER = 'counter'
+
+# Имя -> (тип, описание, границы корзин).
+DEFINITIONS = {
+    'yatube_request_duration_seconds': (
+        HISTOGRAM, 'Время обработки запроса по адресам.', SECONDS_BUCKETS),
+    'yatube_response_size_bytes': (
+        HISTOGRAM, 'Размер тела ответа по адресам.', BYTES_BUCKETS),
+    'yatube_db_queries': (
+        HISTOGRAM, 'Число запросов к базе на запрос по адресам.',
+        QUERIES_BUCKETS),
+    'yatube_page_cache_requests_total': (
+        COUNTER, 'Обращения к кешу страниц: попадания и промахи.', None),
+    'yatube_thumbnail_seconds': (
+        HISTOGRAM, 'Время подготовки картинки поста по этапам.',
+        SECONDS_BUCKETS),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    """Метрики процесса с периодическим сбросом в общий каталог.
+
+    Каждый процесс пишет накопленные значения в свой файл
+    METRICS_DIR/<pid>-<token>.json не чаще раза в
+    METRICS_FLUSH_INTERVAL секунд. Файл заменяется целиком, поэтому
+    читатель не увидит его наполовину записанным. Страница /metrics
+    складывает файлы живых процессов и удаляет файлы завершившихся.
+    Токен отличает процесс от прежнего владельца того же pid.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self._start()
+            self.flushed = time.monotonic()
+
+    def _start(self):
+        self.pid = os.getpid()
+        self.token = uuid.uuid4().hex[:8]
+        self.values = {}
+        self.claimed = False
+
+    def _check_fork(self):
+        # Дочерний процесс наследует значения родителя: без сброса
+        # они попали бы в сумму дважды.
+        if self.pid != os.getpid():
+            self._start()
+
+    def observe(self, name, value, **labels):
+        """Добавляет наблюдение в гистограмму."""
+        buckets = DEFINITIONS[name][2]
+        with self.lock:
+            self._check_fork()
+            series = self.values.setdefault(name, {})
+            data = series.get(_labels_key(labels))
+            if data is None:
+                data = series[_labels_key(labels)] = {
+                    'buckets': [0] * (len(buckets) + 1),
+                    'sum': 0,
+                    'count': 0,
+                }
+            index = next(
+                (number for number, bound in enumerate(buckets)
+                 if value <= bound),
+                len(buckets),
+            )
+            data['buckets'][index] += 1
+            data['sum'] += value
+            data['count'] += 1
+        self.maybe_flush()
+
+    def inc(self, name, amount=1, **labels):
+        """Увеличивает счётчик."""
+        with self.lock:
+            self._check_fork()
+            series = self.values.setdefault(name, {})
+            key = _labels_key(labels)
+            series[key] = series.get(key, 0) + amount
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if time.monotonic() - self.flushed >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def dump(self):
+        with self.lock:
+            self._check_fork()
+            return {
+                name: [[list(key), value] for key, value in series.items()]
+                for name, series in self.values.items()
+            }
+
+    def flush(self):
+        """Записывает значения процесса в его файл."""
+        data = json.dumps(self.dump())
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self.pid}-{self.token}.json')
+        if not self.claimed:
+            # Файлы с нашим pid оставил завершившийся процесс.
+            for stale in glob.glob(os.path.join(directory, f'{self.pid}-*')):
+                if stale != path:
+                    _remove(stale)
+            self.claimed = True
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(data)
+        os.replace(temporary, path)
+        self.flushed = time.monotonic()
+
+
+registry = Registry()
+atexit.register(lambda: registry.values and registry.flush())
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+def inc(name, amount=1, **labels):
+    registry.inc(name, amount, **labels)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю.
+        return True
+    return True
+
+
+def _live_files():
+    """Файлы живых процессов; файлы завершившихся удаляются."""
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*-*.json')):
+        try:
+            pid = int(os.path.basename(path).split('-', 1)[0])
+        except ValueError:
+            continue
+        if _alive(pid):
+            yield path
+        else:
+            _remove(path)
+
+
+def collect_all():
+    """Значения живых процессов, сложенные по именам и меткам."""
+    registry.flush()
+    total = {}
+    for path in _live_files():
+        try:
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            continue
+        for name, series in data.items():
+            if name not in DEFINITIONS:
+                continue
+            merged = total.setdefault(name, {})
+            for labels, value in series:
+                key = tuple(tuple(pair) for pair in labels)
+                if isinstance(value, dict):
+                    current = merged.setdefault(key, {
+                        'buckets': [0] * len(value['buckets']),
+                        'sum': 0,
+                        'count': 0,
+                    })
+                    current['buckets'] = [
+                        left + right for left, right
+                        in zip(current['buckets'], value['buckets'])
+                    ]
+                    current['sum'] += value['sum']
+                    current['count'] += value['count']
+                else:
+                    merged[key] = merged.get(key, 0) + value
+    return total
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        f'{name}="{_escape(value)}"' for name, value in pairs)
+
+
+def _format_number(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def _hit_ratio(counters):
+    """Доля попаданий в кеш страниц по каждой странице."""
+    pages = {}
+    for key, value in counters.items():
+        labels = dict(key)
+        hits, total = pages.get(labels['page'], (0, 0))
+        if labels['result'] == 'hit':
+            hits += value
+        pages[labels['page']] = (hits, total + value)
+    return {
+        (('page', page),): hits / total
+        for page, (hits, total) in pages.items() if total
+    }
+
+
+def render(values):
+    """Метрики в текстовом формате Prometheus."""
+    lines = []
+    for name, (kind, help_text, buckets) in DEFINITIONS.items():
+        series = values.get(name, {})
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key in sorted(series):
+            value = series[key]
+            if kind == COUNTER:
+                lines.append(
+                    f'{name}{_format_labels(key)} {_format_number(value)}')
+                continue
+            cumulative = 0
+            bounds = [str(bound) for bound in buckets] + ['+Inf']
+            for bound, count in zip(bounds, value['buckets']):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket'
+                    f'{_format_labels(key + (("le", bound),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(key)} '
+                         f'{_format_number(value["sum"])}')
+            lines.append(
+                f'{name}_count{_format_labels(key)} {value["count"]}')
+    ratio = 'yatube_page_cache_hit_ratio'
+    lines.append(f'# HELP {ratio} Доля попаданий в кеш страниц.')
+    lines.append(f'# TYPE {ratio} gauge')
+    ratios = _hit_ratio(values.get('yatube_page_cache_requests_total', {}))
+    for key, value in sorted(ratios.items()):
+        lines.append(f'{ratio}{_format_labels(key)} {value:.4f}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,156 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.shortcuts import render
+
+from . import metrics
+from .queries import (QueryRecorder, RepeatedQueriesError, format_report,
+                      logger)
+from .routers import STICKY_COOKIE, begin_request, end_request
+from .timing import collect, current
+from .writes import WriteTimeoutError
+
+timing_logger = logging.getLogger('core.timing')
+
+
+class RepeatedQueriesMiddleware:
+    """Ищет повторяющиеся (N+1) запросы при обработке каждого запроса.
+
+    В разработке пишет предупреждение в лог, с QUERY_REPEAT_RAISE
+    выбрасывает RepeatedQueriesError.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_REPEAT_DETECTION:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        repeated = recorder.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        if repeated:
+            message = f'{request.path}: {format_report(repeated)}'
+            if settings.QUERY_REPEAT_RAISE:
+                raise RepeatedQueriesError(message)
+            logger.warning(message)
+        return response
+
+
+class ServerTimingMiddleware:
+    """Меряет время запросов к базе, шаблонов, кеша и миниатюр.
+
+    Итог отдаётся в заголовке Server-Timing и пишется строкой JSON
+    в лог core.timing. Должен стоять первым, чтобы total охватывал
+    все остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SERVER_TIMING:
+            return self.get_response(request)
+        with collect() as timings:
+            response = self.get_response(request)
+        response['Server-Timing'] = timings.header()
+        match = request.resolver_match
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }))
+        return response
+
+
+class MetricsMiddleware:
+    """Пишет в метрики время, размер ответа и число запросов к базе.
+
+    Метки — имя адреса из resolver_match. Ставится сразу после
+    ServerTimingMiddleware и берёт запросы к базе из его замеров.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = current()
+        if timings is None:
+            with collect() as timings:
+                response, elapsed, queries = self.measure(request, timings)
+        else:
+            response, elapsed, queries = self.measure(request, timings)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.observe(
+            'yatube_request_duration_seconds', elapsed, view=view)
+        metrics.observe('yatube_db_queries', queries, view=view)
+        if not response.streaming:
+            metrics.observe(
+                'yatube_response_size_bytes', len(response.content),
+                view=view)
+        return response
+
+    def measure(self, request, timings):
+        queries = timings.counts['db']
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        return response, elapsed, timings.counts['db'] - queries
+
+
+class ReplicaMiddleware:
+    """Заводит маршрутизацию запроса между основной базой и репликами.
+
+    Если в запросе была запись, ставит cookie, с которой следующие
+    запросы пользователя читают из основной базы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state, token = begin_request(
+            pinned=STICKY_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        if state.written:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True)
+        return response
+
+
+class WriteTimeoutMiddleware:
+    """Отвечает на WriteTimeoutError страницей вместо ошибки 500.
+
+    Выполняемая запись ещё закоммитится: ответ 202 сообщает, что она
+    принята. Отменённая запись не выполнится: ответ 503 предлагает
+    повторить её позже.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, WriteTimeoutError):
+            return None
+        response = render(
+            request, 'core/write_timeout.html',
+            {'pending': exception.pending},
+            status=202 if exception.pending else 503,
+        )
+        if not exception.pending:
+            response['Retry-After'] = str(settings.WRITE_QUEUE_RETRY_AFTER)
+        return response
@@ -0,0 +1,42 @@
+"""Плагин pytest: проверка бюджетов запросов и времени из budgets.json.
+
+Подключается через ``pytest_plugins``. Фикстура ``assert_within_budget``
+выполняет запрос к адресу и падает со списком выполненных запросов,
+если адрес превысил бюджет. С ``--no-time-budgets`` проверяется только
+число запросов: время на медленных машинах нестабильно.
+"""
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--no-time-budgets',
+        action='store_true',
+        help='Не проверять бюджет времени рендеринга из budgets.json.',
+    )
+
+
+def budget_names():
+    """Имена адресов из budgets.json для parametrize."""
+    from core.budgets import load_budgets
+    return sorted(load_budgets())
+
+
+@pytest.fixture(scope='session')
+def budgets():
+    from core.budgets import load_budgets
+    return load_budgets()
+
+
+@pytest.fixture
+def assert_within_budget(budgets, request, settings):
+    from core.budgets import check_budget
+    settings.DEBUG = False
+    settings.QUERY_REPEAT_DETECTION = False
+    check_time = not request.config.getoption('--no-time-budgets')
+
+    def check(route):
+        assert route.name in budgets, (
+            f'Для адреса {route.name} нет бюджета в budgets.json')
+        return check_budget(route, budgets[route.name], check_time)
+    return check
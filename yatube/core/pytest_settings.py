@@ -0,0 +1,12 @@
+"""Плагин pytest: настройки тестов из core.test_runner.
+
+Подключается через ``pytest_plugins``, как TestRunner для manage.py test.
+"""
+import pytest
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_environment_settings(django_test_environment):
+    from core.test_runner import test_settings
+    with test_settings():
+        yield
@@ -0,0 +1,88 @@
+import inspect
+import logging
+import os
+import re
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+STRINGS = re.compile(r"'(?:[^']|'')*'")
+NUMBERS = re.compile(r'\b\d+\b')
+PLACEHOLDER_LISTS = re.compile(r'\((?:\s*%s\s*,)*\s*%s\s*\)')
+
+
+class RepeatedQueriesError(AssertionError):
+    """Один и тот же запрос выполнился больше допустимого числа раз."""
+
+
+def fingerprint(sql):
+    """Приводит SQL к виду без литералов и длины списков IN (...)."""
+    sql = STRINGS.sub('?', sql)
+    sql = NUMBERS.sub('?', sql)
+    sql = PLACEHOLDER_LISTS.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+def find_trigger(ignore=()):
+    """Ищет в стеке тег шаблона или строку кода, выполнившую запрос.
+
+    Файлы из ``ignore`` пропускаются так же, как сам этот модуль.
+    """
+    code_line = None
+    frame = inspect.currentframe()
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        # type() вместо isinstance(): isinstance вычисляет ленивые
+        # объекты вроде request.user и порождает новые запросы.
+        if issubclass(type(node), Node) and getattr(node, 'token', None):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if (code_line is None and filename.startswith(settings.BASE_DIR)
+                and filename != __file__ and filename not in ignore):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            code_line = f'{path}:{frame.f_lineno}'
+        frame = frame.f_back
+    return code_line or 'неизвестно'
+
+
+class QueryRecorder:
+    """Обёртка для execute_wrapper, запоминающая отпечатки запросов."""
+
+    def __init__(self):
+        self.queries = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries[fingerprint(sql)].append(find_trigger())
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        return {
+            sql: triggers for sql, triggers in self.queries.items()
+            if len(triggers) > threshold
+        }
+
+
+def format_report(repeated):
+    lines = []
+    for sql, triggers in repeated.items():
+        trigger, _ = Counter(triggers).most_common(1)[0]
+        lines.append(f'{len(triggers)} раз(а) из {trigger}: {sql}')
+    return 'Повторяющиеся запросы:\n' + '\n'.join(lines)
+
+
+@contextmanager
+def detect_repeated_queries(threshold=None, using='default'):
+    """Падает с RepeatedQueriesError, если внутри блока есть N+1."""
+    if threshold is None:
+        threshold = settings.QUERY_REPEAT_THRESHOLD
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+    repeated = recorder.repeated(threshold)
+    if repeated:
+        raise RepeatedQueriesError(format_report(repeated))
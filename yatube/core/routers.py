@@ -0,0 +1,129 @@
+"""Чтение лент с реплик, запись в основную базу.
+
+Реплики перечислены в REPLICA_DATABASES. С них читают только view,
+обёрнутые в read_from_replica, и только пока пользователь ничего
+не записал: после записи запрос до конца идёт в основную базу, а
+ReplicaMiddleware ставит cookie, с которой туда же идут запросы
+следующих REPLICA_STICKY_SECONDS секунд. Так страница после
+перенаправления показывает изменение, которого реплика ещё не видела.
+Сессии и пользователи всегда читаются из основной базы: отстающая
+реплика разлогинила бы только что вошедшего пользователя.
+"""
+import contextvars
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'use_primary'
+PRIMARY_MODELS = {'sessions.session', settings.AUTH_USER_MODEL.lower()}
+
+_state = contextvars.ContextVar('replica_state', default=None)
+
+
+class RequestState:
+    def __init__(self, pinned=False):
+        self.use_replica = False
+        self.pinned = pinned
+        self.written = False
+        self.replicas = set()
+
+
+def begin_request(pinned=False):
+    """Заводит состояние маршрутизации запроса; возвращает токен."""
+    state = RequestState(pinned)
+    return state, _state.set(state)
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def stick_to_primary():
+    """Отправляет чтение до конца запроса и после него в основную базу."""
+    state = _state.get()
+    if state is not None:
+        state.pinned = state.written = True
+
+
+def replicas_synced_since(timestamp):
+    """Все ли реплики, с которых читал запрос, скопированы не раньше
+    ``timestamp`` (в наносекундах time.time_ns)."""
+    state = _state.get()
+    if state is None or not state.replicas:
+        return True
+    synced = cache.get_many([synced_key(alias) for alias in state.replicas])
+    return len(synced) == len(state.replicas) and all(
+        value >= timestamp for value in synced.values())
+
+
+def synced_key(alias):
+    return f'replica_synced:{alias}'
+
+
+def read_from_replica(view_func):
+    """Разрешает view читать с реплик."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if state is None:
+            return view_func(request, *args, **kwargs)
+        previous, state.use_replica = state.use_replica, True
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            state.use_replica = previous
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (state is None or not state.use_replica or state.pinned
+                or not settings.REPLICA_DATABASES
+                or model._meta.label_lower in PRIMARY_MODELS
+                # Реплика не видит незакоммиченных данных.
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        alias = random.choice(settings.REPLICA_DATABASES)
+        state.replicas.add(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        stick_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Во всех базах одни и те же данные.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики получают схему вместе с данными при копировании.
+        return db == DEFAULT_DB_ALIAS
+
+
+def copy_database(source, target):
+    """Копирует базу SQLite постранично через backup API.
+
+    В отличие от копирования файла, не ломается о запись в исходную
+    базу во время копирования.
+    """
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+
+
+def sync_replicas():
+    """Обновляет все реплики из основной базы.
+
+    Время начала копирования запоминается в кеше: всё, что записано
+    раньше него, реплика уже видит (см. replicas_synced_since).
+    """
+    for alias in settings.REPLICA_DATABASES:
+        started = time.time_ns()
+        copy_database(connections[DEFAULT_DB_ALIAS], connections[alias])
+        cache.set(synced_key(alias), started, None)
+    return list(settings.REPLICA_DATABASES)
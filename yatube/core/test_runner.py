@@ -0,0 +1,57 @@
+import logging
+import os
+import shutil
+import tempfile
+from copy import deepcopy
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Настройки тестов поверх боевых. Фоновый процесс картинок пережил бы
+# тест и писал во временную папку медиа, пока её удаляют; очередь
+# записей держала бы записи теста до его конца.
+TEST_SETTINGS = {
+    'THUMBNAIL_WORKERS': 0,
+    'WRITE_QUEUE': False,
+}
+
+
+class test_settings(override_settings):
+    """Настройки тестов и файловые кеши в своей временной папке.
+
+    Папка своя у каждого прогона: тесты очищают кеши и иначе стирали
+    бы кеш запущенного сервера и кеши параллельного прогона.
+    """
+
+    def __init__(self):
+        super().__init__(**TEST_SETTINGS)
+
+    def enable(self):
+        self.cache_dir = tempfile.mkdtemp(prefix='yatube_test_cache_')
+        cache_settings = deepcopy(settings.CACHES)
+        for alias, params in cache_settings.items():
+            if params['BACKEND'].endswith('.FileBasedCache'):
+                params['LOCATION'] = os.path.join(self.cache_dir, alias)
+        self.options['CACHES'] = cache_settings
+        super().enable()
+        # LOGGING применяется один раз при setup(), override_settings его
+        # не перечитывает: строку на каждый запрос глушим напрямую.
+        logging.getLogger('core.timing').setLevel(logging.WARNING)
+
+    def disable(self):
+        super().disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    """Включает настройки тестов на время прогона."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = test_settings()
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
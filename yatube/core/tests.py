@@ -1,4 +1,37 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.template.loader import render_to_string
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.budgets import (BudgetExceededError, Route, check_budget,
+                          load_budgets)
+from core import metrics
+from core.cache import TwoTierCache
+from core.queries import (RepeatedQueriesError, detect_repeated_queries,
+                          fingerprint)
+from core.routers import (STICKY_COOKIE, ReplicaRouter, begin_request,
+                          copy_database, end_request, synced_key)
+from core.timing import RequestTimings, activate, deactivate, span
+from core.writes import (WriteQueue, WriteTimeoutError, queued_write,
+                         submit_write, write_queue)
+from posts.cache import FEED_VERSION_KEY
+from posts.follow_graph import following_ids, following_key
+from posts.models import Comment, Follow, Post, PostQuerySet
+
+User = get_user_model()
 
 
 class CoreViewsTests(TestCase):
@@ -6,3 +39,657 @@ class CoreViewsTests(TestCase):
         """Несущестующая страница использует шаблон core/404.html."""
         response = self.client.get('/nonexist-page/')
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class RepeatedQueriesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for i in range(3):
+            author = User.objects.create(username=f'Author_{i}')
+            Post.objects.create(author=author, text=f'Тестовый пост {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_fingerprint(self):
+        """Отпечаток не зависит от литералов и длины списка IN."""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND x = 1'),
+            fingerprint("SELECT * FROM t WHERE id IN (%s) AND x = 'a'"),
+        )
+
+    def test_detect_reports_template_line(self):
+        """Повторяющийся запрос указывает на строку шаблона.
+
+        Автора и группу читает ключ карточки в теге post_cards, до
+        рендеринга самих карточек: строка — тег в posts/index.html.
+        """
+        with self.assertRaisesMessage(
+                RepeatedQueriesError, 'posts/index.html:'):
+            with detect_repeated_queries(threshold=2):
+                render_to_string(
+                    'posts/index.html',
+                    {'page_obj': Post.objects.all()})
+
+    def test_detect_passes_shaped_queryset(self):
+        """Выборка for_feed() не даёт повторяющихся запросов."""
+        with detect_repeated_queries(threshold=1):
+            render_to_string(
+                'posts/index.html',
+                {'page_obj': Post.objects.for_feed()})
+
+    @override_settings(QUERY_REPEAT_DETECTION=True, QUERY_REPEAT_RAISE=True,
+                       QUERY_REPEAT_THRESHOLD=1)
+    def test_middleware_raises(self):
+        """Middleware выбрасывает ошибку при N+1 на странице."""
+        self.client.get(reverse('posts:main_page'))
+        cache.clear()
+        with mock.patch.object(PostQuerySet, 'for_feed', lambda qs: qs):
+            with self.assertRaises(RepeatedQueriesError):
+                self.client.get(reverse('posts:main_page'))
+
+
+class TwoTierCacheTests(TestCase):
+    def make_cache(self, **options):
+        params = {'OPTIONS': {'L1_TIMEOUT': 60, 'LOCK_WAIT': 0.1}}
+        params['OPTIONS'].update(options)
+        return TwoTierCache('shared', params)
+
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_l1_serves_recent_values(self):
+        """Недавнее значение берётся из памяти процесса без L2."""
+        two_tier = self.make_cache()
+        two_tier.set('key', 'value')
+        caches['shared'].clear()
+        self.assertEqual(two_tier.get('key'), 'value')
+
+    def test_l1_evicts_least_recently_used(self):
+        """L1 вытесняет давно не использованные ключи."""
+        two_tier = self.make_cache(L1_MAX_ENTRIES=2)
+        for key in ('first', 'second', 'third'):
+            two_tier.set(key, key)
+        self.assertEqual(len(two_tier._l1), 2)
+        self.assertNotIn(two_tier.make_key('first'), two_tier._l1)
+
+    def test_value_shared_between_processes(self):
+        """Значение из L2 видно другому процессу."""
+        self.make_cache().set('key', 'value')
+        self.assertEqual(self.make_cache().get('key'), 'value')
+
+    def test_miss_does_not_lock(self):
+        """Простой get при промахе не блокирует ключ для остальных."""
+        first, second = self.make_cache(), self.make_cache()
+        self.assertIsNone(first.get('key'))
+        started = time.monotonic()
+        self.assertIsNone(second.get('key'))
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertTrue(second.add('key:lock', True))
+
+    def test_single_flight_on_miss(self):
+        """При промахе в get_or_set пересчитывает только один процесс."""
+        first = self.make_cache(LOCK_WAIT=2)
+        second = self.make_cache(LOCK_WAIT=2)
+        calls = []
+
+        def compute(name):
+            calls.append(name)
+            time.sleep(0.2)
+            return name
+
+        thread = threading.Thread(
+            target=first.get_or_set, args=('key', lambda: compute('first')))
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual(
+            second.get_or_set('key', lambda: compute('second')), 'first')
+        thread.join()
+        self.assertEqual(calls, ['first'])
+
+    def test_failed_recompute_releases_lock(self):
+        """Упавший пересчёт не держит блокировку до её истечения."""
+        first, second = self.make_cache(), self.make_cache()
+        with self.assertRaises(ValueError):
+            first.get_or_set('key', mock.Mock(side_effect=ValueError))
+        started = time.monotonic()
+        self.assertEqual(second.get_or_set('key', 'value'), 'value')
+        self.assertLess(time.monotonic() - started, 0.1)
+
+    def test_stale_value_while_recomputing(self):
+        """Пока ключ пересчитывается, остальные получают старое значение."""
+        first, second = self.make_cache(), self.make_cache()
+        first.set('key', 'old', timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(first.get('key'))
+        self.assertEqual(second.get('key'), 'old')
+        first.set('key', 'new')
+        self.assertEqual(self.make_cache().get('key'), 'new')
+
+    def test_probabilistic_early_expiration(self):
+        """Запись может устареть раньше срока, но лишь у одного процесса."""
+        first = self.make_cache(EARLY_EXPIRATION_BETA=10 ** 9)
+        second = self.make_cache(EARLY_EXPIRATION_BETA=10 ** 9)
+        first.set('key', 'value', timeout=60)
+        first._l1.clear()
+        self.assertIsNone(first.get('key'))
+        self.assertEqual(second.get('key'), 'value')
+
+    def test_delete_reaches_other_processes(self):
+        """Сброс ключа без L1 виден сразу, остальных — за L1_TIMEOUT."""
+        first = self.make_cache(
+            L1_TIMEOUT=0.1, L1_SKIP_PREFIXES=['version'])
+        second = self.make_cache(
+            L1_TIMEOUT=0.1, L1_SKIP_PREFIXES=['version'])
+        for key in ('version', 'value'):
+            first.set(key, 1)
+            self.assertEqual(second.get(key), 1)
+            first.delete(key)
+        self.assertIsNone(second.get('version'))
+        self.assertEqual(second.get('value'), 1)
+        time.sleep(0.1)
+        self.assertIsNone(second.get('value'))
+
+    def test_invalidated_keys_skip_l1(self):
+        """Версия лент и подписки не кешируются в памяти процесса."""
+        two_tier = caches['default']
+        for key in (FEED_VERSION_KEY, following_key(1)):
+            with self.subTest(key=key):
+                self.assertFalse(two_tier._use_l1(key))
+
+
+class BudgetTests(TestCase):
+    def setUp(self):
+        Post.objects.create(
+            author=User.objects.create(username='HasNoName'),
+            text='Тестовый пост',
+        )
+
+    def test_within_budget(self):
+        """Адрес в пределах бюджета проходит проверку."""
+        response, _, queries = check_budget(
+            Route('posts:main_page'), {'queries': 1, 'ms': 10 ** 6})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_budget_exceeded(self):
+        """Превышение бюджета выводит запросы и место их вызова."""
+        with self.assertRaisesMessage(
+                BudgetExceededError, '1 запросов при бюджете 0'
+        ) as error:
+            check_budget(Route('posts:main_page'), {'queries': 0, 'ms': 0})
+        self.assertIn('posts/paginators.py', str(error.exception))
+        self.assertIn('мс при бюджете 0 мс', str(error.exception))
+
+    def test_budgets_file(self):
+        """У каждого бюджета задано число запросов и время."""
+        for name, budget in load_budgets().items():
+            with self.subTest(name=name):
+                self.assertEqual(set(budget), {'queries', 'ms'})
+
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Post.objects.create(
+            author=User.objects.create(username='HasNoName'),
+            text='Тестовый пост',
+        )
+
+    def test_header_and_log(self):
+        """Ответ несёт Server-Timing, в лог пишется строка JSON."""
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:main_page'))
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn('tpl;dur=', header)
+        self.assertIn('total;dur=', header)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:main_page')
+        self.assertEqual(record['db_count'], 1)
+        self.assertGreater(record['tpl_count'], 0)
+
+    def test_cache_hits_counted(self):
+        """Повторный запрос к главной засчитывается как попадание в кеш."""
+        self.client.get(reverse('posts:main_page'))
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:main_page'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['db_count'], 0)
+        self.assertGreater(record['cache_hits'], 0)
+        self.assertIn('hits', response['Server-Timing'])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        """Замеры отключаются настройкой SERVER_TIMING."""
+        response = self.client.get(reverse('posts:main_page'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_nested_spans_counted_once(self):
+        """Вложенный замер того же вида не засчитывается дважды."""
+        timings = RequestTimings()
+        token = activate(timings)
+        try:
+            with span('tpl'):
+                with span('tpl'):
+                    pass
+            with span('thumb'):
+                pass
+        finally:
+            deactivate(token)
+        timings.finish()
+        self.assertEqual(timings.counts['tpl'], 1)
+        self.assertIn('thumb;dur=', timings.header())
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = self.settings(METRICS_DIR=directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory
+        metrics.registry.clear()
+        self.addCleanup(metrics.registry.clear)
+        cache.clear()
+
+    def test_request_histograms(self):
+        """Запрос попадает в гистограммы с именем адреса в метке."""
+        self.client.get(reverse('posts:main_page'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count'
+            '{view="posts:main_page"} 1', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="posts:main_page",le="+Inf"} 1', text)
+        self.assertIn('yatube_db_queries_sum{view="posts:main_page"} 1',
+                      text)
+        self.assertIn('yatube_response_size_bytes_count'
+                      '{view="posts:main_page"} 1', text)
+
+    def test_page_cache_ratio(self):
+        """Считаются попадания в кеш главной и их доля."""
+        for _ in range(4):
+            self.client.get(reverse('posts:main_page'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_page_cache_requests_total'
+                      '{page="index_page",result="hit"} 3', text)
+        self.assertIn(
+            'yatube_page_cache_hit_ratio{page="index_page"} 0.7500', text)
+
+    def test_processes_summed(self):
+        """Значения из файлов других процессов складываются."""
+        metrics.observe('yatube_thumbnail_seconds', 0.2, stage='variants')
+        metrics.registry.flush()
+        os.rename(self.own_file(),
+                  os.path.join(self.directory, '1-other.json'))
+        metrics.registry.clear()
+        metrics.observe('yatube_thumbnail_seconds', 20, stage='variants')
+        text = metrics.render(metrics.collect_all())
+        self.assertIn(
+            'yatube_thumbnail_seconds_bucket{stage="variants",le="0.25"} 1',
+            text)
+        self.assertIn(
+            'yatube_thumbnail_seconds_bucket{stage="variants",le="+Inf"} 2',
+            text)
+        self.assertIn(
+            'yatube_thumbnail_seconds_sum{stage="variants"} 20.2', text)
+
+    def own_file(self):
+        return os.path.join(
+            self.directory,
+            f'{os.getpid()}-{metrics.registry.token}.json')
+
+    def test_dead_processes_pruned(self):
+        """Файлы завершившихся процессов удаляются и не входят в сумму."""
+        process = subprocess.Popen(['true'])
+        process.wait()
+        metrics.inc('yatube_page_cache_requests_total',
+                    page='index_page', result='hit')
+        metrics.registry.flush()
+        dead = os.path.join(self.directory, f'{process.pid}-other.json')
+        reused = os.path.join(self.directory, f'{os.getpid()}-other.json')
+        for path in (dead, reused):
+            shutil.copy(self.own_file(), path)
+        metrics.registry.clear()
+        metrics.inc('yatube_page_cache_requests_total',
+                    page='index_page', result='hit')
+        text = metrics.render(metrics.collect_all())
+        self.assertIn('yatube_page_cache_requests_total'
+                      '{page="index_page",result="hit"} 1', text)
+        self.assertFalse(os.path.exists(dead))
+        self.assertFalse(os.path.exists(reused))
+
+    def test_access_restricted(self):
+        """С чужого адреса метрики видит только персонал."""
+        url = reverse('metrics')
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 403)
+        self.client.force_login(
+            User.objects.create(username='admin', is_staff=True))
+        self.assertEqual(
+            self.client.get(url, REMOTE_ADDR='10.0.0.1').status_code, 200)
+
+
+class SQLiteProfileTests(TestCase):
+    """Файл базы в WAL выдерживает параллельную запись из потоков."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'stress.sqlite3')
+
+    def connect(self):
+        wrapper = DatabaseWrapper({**connection.settings_dict,
+                                   'NAME': self.path})
+        wrapper.ensure_connection()
+        return wrapper
+
+    def test_pragmas(self):
+        """Новое соединение получает PRAGMA из настроек."""
+        wrapper = self.connect()
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 20000)
+
+    def test_parallel_writes(self):
+        """Запись из восьми потоков вперемешку с чтением без ошибок."""
+        wrapper = self.connect()
+        with wrapper.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE item (id INTEGER PRIMARY KEY, text TEXT)')
+        wrapper.close()
+        errors = []
+        threads_count, writes = 8, 50
+
+        def work(number):
+            wrapper = self.connect()
+            try:
+                for write in range(writes):
+                    with wrapper.cursor() as cursor:
+                        cursor.execute('SELECT COUNT(*) FROM item')
+                        cursor.execute('BEGIN')
+                        cursor.execute(
+                            'INSERT INTO item (text) VALUES (%s)',
+                            [f'{number}-{write}'])
+                        cursor.execute(
+                            'INSERT INTO item (text) VALUES (%s)',
+                            [f'{number}-{write}-2'])
+                        cursor.execute('COMMIT')
+            except Exception as error:
+                errors.append(error)
+            finally:
+                wrapper.close()
+
+        threads = [threading.Thread(target=work, args=(number,))
+                   for number in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        wrapper = self.connect()
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], threads_count * writes * 2)
+
+
+class WriteQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.queue = WriteQueue()
+        self.addCleanup(self.queue.stop)
+
+    @override_settings(WRITE_QUEUE_INTERVAL=0.2)
+    def test_batched(self):
+        """Записи, пришедшие за интервал, пишутся одной транзакцией."""
+        with mock.patch.object(
+                self.queue, 'write', wraps=self.queue.write) as write:
+            futures = [
+                self.queue.submit(User.objects.create, username=f'user{n}')
+                for n in range(3)
+            ]
+            for future in futures:
+                future.result(timeout=5)
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_failure_isolated(self):
+        """Ошибка одной записи не откатывает остальные в пачке."""
+        futures = [
+            self.queue.submit(User.objects.create, username=username)
+            for username in ('first', 'first', 'second')
+        ]
+        self.assertIsNone(futures[0].exception(timeout=5))
+        self.assertIsNotNone(futures[1].exception(timeout=5))
+        self.assertIsNone(futures[2].exception(timeout=5))
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_inline_in_transaction(self):
+        """Внутри транзакции запись выполняется сразу, без писателя."""
+        with override_settings(WRITE_QUEUE=True):
+            with transaction.atomic():
+                future = submit_write(User.objects.create, username='user')
+                self.assertTrue(future.done())
+                self.assertTrue(User.objects.exists())
+
+    def test_dead_writer_restarted(self):
+        """Если писатель умер, следующая запись запускает нового."""
+        with mock.patch('threading.excepthook'):
+            self.queue.submit(mock.Mock(side_effect=SystemExit))
+            self.queue.thread.join(timeout=5)
+        self.assertFalse(self.queue.thread.is_alive())
+        future = self.queue.submit(User.objects.create, username='user')
+        self.assertEqual(future.result(timeout=5).username, 'user')
+
+    @override_settings(WRITE_QUEUE=True, WRITE_QUEUE_TIMEOUT=0.1)
+    def test_timeout_cancels_waiting_write(self):
+        """Не начатая за таймаут запись отменяется, и view отвечает 503."""
+        self.addCleanup(write_queue.stop)
+        author = User.objects.create(username='author')
+        reader = User.objects.create(username='reader')
+        release = threading.Event()
+        self.addCleanup(release.set)
+        write_queue.submit(release.wait, 5)
+        self.client.force_login(reader)
+        with self.assertLogs('core.writes', 'WARNING'):
+            response = self.client.get(reverse(
+                'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        release.set()
+        write_queue.stop()
+        self.assertFalse(
+            Follow.objects.filter(user=reader, author=author).exists())
+
+    @override_settings(WRITE_QUEUE_TIMEOUT=0.1)
+    def test_timeout_reports_pending_write(self):
+        """Начатая запись не отменяется, и view сообщает, что она принята."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_create(**kwargs):
+            release.wait(5)
+            return User.objects.create(**kwargs)
+
+        future = self.queue.submit(slow_create, username='user')
+        with mock.patch('core.writes.submit_write', return_value=future):
+            with self.assertLogs('core.writes', 'WARNING'):
+                with self.assertRaises(WriteTimeoutError) as error:
+                    queued_write(slow_create, username='user')
+        self.assertTrue(error.exception.pending)
+        release.set()
+        self.assertEqual(future.result(timeout=5).username, 'user')
+
+    @override_settings(WRITE_QUEUE=True)
+    def test_views_read_your_writes(self):
+        """После перенаправления пользователь видит свою запись."""
+        self.addCleanup(write_queue.stop)
+        author = User.objects.create(username='author')
+        reader = User.objects.create(username='reader')
+        post = Post.objects.create(author=author, text='Тестовый пост')
+        self.client.force_login(reader)
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Новый комментарий'},
+            follow=True,
+        )
+        self.assertContains(response, 'Новый комментарий')
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=author).exists())
+        self.assertIsNotNone(write_queue.thread)
+        self.assertEqual(Comment.objects.get().author, reader)
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.post = Post.objects.create(
+            author=self.author, text='Тестовый пост')
+
+    def count_queries(self, alias, url, method='get', data=None, **extra):
+        log = []
+        wrapper = (lambda execute, sql, *args:
+                   log.append(sql) or execute(sql, *args))
+        with connections[alias].execute_wrapper(wrapper):
+            response = getattr(self.client, method)(url, data, **extra)
+        return response, len(log)
+
+    def test_feed_reads_from_replica(self):
+        """Ленты читаются с реплики, прочие страницы — из основной базы."""
+        response, replica = self.count_queries(
+            'replica', reverse('posts:main_page'))
+        self.assertContains(response, 'Тестовый пост')
+        self.assertGreater(replica, 0)
+        _, replica = self.count_queries('replica', reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.assertEqual(replica, 0)
+
+    def test_primary_after_write(self):
+        """После записи пользователь какое-то время читает основную базу."""
+        self.client.force_login(User.objects.create(username='reader'))
+        response, _ = self.count_queries(
+            'replica',
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            'post', {'text': 'Комментарий'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        _, replica = self.count_queries(
+            'replica', reverse('posts:main_page'))
+        self.assertEqual(replica, 0)
+        del self.client.cookies[STICKY_COOKIE]
+        cache.clear()
+        _, replica = self.count_queries(
+            'replica', reverse('posts:main_page'))
+        self.assertGreater(replica, 0)
+
+    def test_transaction_reads_primary(self):
+        """Внутри транзакции чтение идёт в основную базу."""
+        router = ReplicaRouter()
+        state, token = begin_request()
+        self.addCleanup(end_request, token)
+        state.use_replica = True
+        self.assertEqual(router.db_for_read(Post), 'replica')
+        with transaction.atomic():
+            self.assertEqual(router.db_for_read(Post), 'default')
+        router.db_for_write(Post)
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_following_reads_primary(self):
+        """Подписки для кеша читаются из основной базы."""
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        state, token = begin_request()
+        self.addCleanup(end_request, token)
+        state.use_replica = True
+        log = []
+        wrapper = (lambda execute, sql, *args:
+                   log.append(sql) or execute(sql, *args))
+        with connections['replica'].execute_wrapper(wrapper):
+            self.assertIn(self.author.pk, following_ids(reader.pk))
+        self.assertEqual(log, [])
+
+    def test_auth_reads_primary(self):
+        """Сессия и пользователь читаются из основной базы."""
+        router = ReplicaRouter()
+        state, token = begin_request()
+        self.addCleanup(end_request, token)
+        state.use_replica = True
+        self.assertEqual(router.db_for_read(User), 'default')
+        self.assertEqual(router.db_for_read(Session), 'default')
+        self.client.force_login(User.objects.create(username='reader'))
+        log = []
+        wrapper = (lambda execute, sql, *args:
+                   log.append(sql) or execute(sql, *args))
+        with connections['replica'].execute_wrapper(wrapper):
+            response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(log)
+        for sql in log:
+            self.assertNotIn('FROM "django_session"', sql)
+            self.assertNotIn('FROM "auth_user"', sql)
+
+    def test_stale_replica_page_not_cached(self):
+        """Страница с не обновлённой реплики не попадает в кеш страниц."""
+        url = reverse('posts:main_page')
+        for _ in range(2):
+            _, replica = self.count_queries('replica', url)
+            self.assertGreater(replica, 0)
+        cache.set(synced_key('replica'), time.time_ns(), None)
+        _, replica = self.count_queries('replica', url)
+        self.assertGreater(replica, 0)
+        _, replica = self.count_queries('replica', url)
+        self.assertEqual(replica, 0)
+
+    def test_stale_replica_etag_not_cached(self):
+        """ETag ленты API с не обновлённой реплики не попадает в кеш."""
+        url = reverse('posts:api_main_page')
+        response, replica = self.count_queries('replica', url)
+        self.assertGreater(replica, 0)
+        _, replica = self.count_queries(
+            'replica', url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertGreater(replica, 0)
+        cache.set(synced_key('replica'), time.time_ns(), None)
+        self.count_queries('replica', url)
+        response, replica = self.count_queries(
+            'replica', url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(replica, 0)
+
+    def test_copy_keeps_replica_in_sync(self):
+        """Реплика видит новые данные основной базы после копирования."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        primary, replica = (
+            DatabaseWrapper({**connection.settings_dict,
+                             'NAME': os.path.join(directory, name)})
+            for name in ('primary.sqlite3', 'replica.sqlite3')
+        )
+        self.addCleanup(primary.close)
+        self.addCleanup(replica.close)
+        with primary.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (text TEXT)')
+            cursor.execute("INSERT INTO item VALUES ('первый')")
+        copy_database(primary, replica)
+        with primary.cursor() as cursor:
+            cursor.execute("INSERT INTO item VALUES ('второй')")
+        with replica.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+        copy_database(primary, replica)
+        with replica.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 2)
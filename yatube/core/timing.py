@@ -0,0 +1,152 @@
+import contextvars
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+from sorl.thumbnail.base import ThumbnailBackend
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+# Имя в Server-Timing и подпись к числу вызовов.
+METRICS = (
+    ('db', 'queries'),
+    ('tpl', 'renders'),
+    ('cache', 'calls'),
+    ('thumb', 'thumbnails'),
+)
+
+
+class RequestTimings:
+    """Время и число вызовов по видам работы в одном запросе.
+
+    Вложенные замеры одного вида не суммируются повторно: шаблон,
+    отрисованный внутри другого шаблона, уже учтён во внешнем. Виды
+    могут пересекаться: запросы из шаблонов входят и в db, и в tpl.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.durations = defaultdict(float)
+        self.counts = Counter()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.active = set()
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def header(self):
+        """Значение заголовка Server-Timing (миллисекунды)."""
+        parts = []
+        for name, unit in METRICS:
+            if not self.counts[name]:
+                continue
+            desc = f'{self.counts[name]} {unit}'
+            if name == 'cache':
+                desc += f', {self.cache_hits} hits, {self.cache_misses} misses'
+            parts.append(
+                f'{name};dur={self.durations[name] * 1000:.2f};desc="{desc}"')
+        parts.append(f'total;dur={self.total * 1000:.2f}')
+        return ', '.join(parts)
+
+    def as_dict(self):
+        data = {'total_ms': round(self.total * 1000, 2)}
+        for name, _ in METRICS:
+            data[f'{name}_ms'] = round(self.durations[name] * 1000, 2)
+            data[f'{name}_count'] = self.counts[name]
+        data['cache_hits'] = self.cache_hits
+        data['cache_misses'] = self.cache_misses
+        return data
+
+
+def current():
+    """Замеры текущего запроса или None, если они не идут."""
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Собирает замеры блока, включая запросы ко всем базам."""
+    timings = RequestTimings()
+    token = activate(timings)
+    try:
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(QueryTimer()))
+            yield timings
+    finally:
+        deactivate(token)
+        timings.finish()
+
+
+def activate(timings):
+    """Делает замеры текущими для этого потока; возвращает токен."""
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Засчитывает время блока в замеры текущего запроса, если они идут."""
+    timings = _current.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - started
+        timings.counts[name] += 1
+        timings.active.discard(name)
+
+
+def record_cache(hit):
+    """Засчитывает попадание или промах кеша в текущий запрос."""
+    timings = _current.get()
+    if timings is None:
+        return
+    if hit:
+        timings.cache_hits += 1
+    else:
+        timings.cache_misses += 1
+
+
+class QueryTimer:
+    """Обёртка для execute_wrapper, засчитывающая время запросов к базе."""
+
+    def __call__(self, execute, sql, params, many, context):
+        with span('db'):
+            return execute(sql, params, many, context)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with span('tpl'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Шаблонизатор Django, засчитывающий время рендеринга в запрос."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(
+            super().get_template(template_name).template, self)
+
+
+class TimedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, засчитывающий время миниатюр в запрос."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        with span('thumb'):
+            return super().get_thumbnail(file_, geometry_string, **options)
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+from . import metrics as metrics_store
 
 
 def page_not_found(request, exception):
@@ -9,3 +14,18 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html', status=403)
+
+
+@never_cache
+def metrics(request):
+    """Метрики всех процессов для Prometheus.
+
+    Доступны персоналу и адресам из METRICS_ALLOWED_IPS.
+    """
+    allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics_store.render(metrics_store.collect_all()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
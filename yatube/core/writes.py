@@ -0,0 +1,174 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .routers import stick_to_primary
+
+logger = logging.getLogger(__name__)
+
+
+class WriteTimeoutError(Exception):
+    """Запись не завершилась за WRITE_QUEUE_TIMEOUT секунд.
+
+    ``pending`` истинно, если писатель уже выполняет запись и она ещё
+    может закоммититься; иначе запись снята с очереди и не выполнится.
+    """
+
+    def __init__(self, pending):
+        super().__init__(
+            'Запись ещё выполняется' if pending else 'Запись отменена')
+        self.pending = pending
+
+
+class WriteQueue:
+    """Очередь записей с одним потоком-писателем.
+
+    SQLite пропускает только одного писателя за раз, и потоки запросов
+    ждали бы друг друга на блокировке базы. Писатель собирает записи,
+    пришедшие за WRITE_QUEUE_INTERVAL секунд, и выполняет их в одной
+    транзакции; каждая запись — в своей точке сохранения, поэтому
+    ошибка одной не откатывает остальные. Результат или исключение
+    записи попадает в её Future после коммита.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        self.start()
+        future = Future()
+        self.queue.put((future, func, args, kwargs))
+        return future
+
+    def start(self):
+        with self.lock:
+            # После fork поток-писатель остаётся в родительском процессе.
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.queue = queue.Queue()
+                self.thread = None
+            if self.thread is not None and self.thread.is_alive():
+                return
+            if self.thread is not None:
+                # Записи, ждущие в очереди, выполнит новый писатель.
+                logger.error('Писатель очереди записей завершился')
+            self.thread = threading.Thread(
+                target=self.run, name='write-queue', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Дописывает очередь и останавливает писателя."""
+        if self.thread is None or self.pid != os.getpid():
+            return
+        if not self.thread.is_alive():
+            self.thread = None
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + settings.WRITE_QUEUE_INTERVAL
+            stop = False
+            while len(batch) < settings.WRITE_QUEUE_BATCH_SIZE:
+                try:
+                    item = self.queue.get(
+                        timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self.write(batch)
+            if stop:
+                break
+        connection.close()
+
+    def write(self, batch):
+        connection.close_if_unusable_or_obsolete()
+        results = []
+        try:
+            with transaction.atomic():
+                for future, func, args, kwargs in batch:
+                    # Запись, отменённую по таймауту ожидания, пропускаем.
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append(
+                                (future, func(*args, **kwargs), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except Exception as error:
+            logger.exception('Не удалось записать пачку из %s', len(batch))
+            for future, *_ in batch:
+                _fail(future, error)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+def _fail(future, error):
+    """Передаёт ошибку пачки записи, если её не отменили."""
+    if future.cancelled():
+        return
+    if future.running() or future.set_running_or_notify_cancel():
+        future.set_exception(error)
+
+
+write_queue = WriteQueue()
+atexit.register(write_queue.stop)
+
+
+def submit_write(func, *args, **kwargs):
+    """Ставит запись в очередь; возвращает Future с её результатом.
+
+    Без WRITE_QUEUE или внутри транзакции запись выполняется сразу:
+    писатель не увидел бы незакоммиченных данных, а ожидание его
+    блокировки из открытой транзакции закончилось бы тупиком.
+    """
+    if settings.WRITE_QUEUE and not connection.in_atomic_block:
+        return write_queue.submit(func, *args, **kwargs)
+    future = Future()
+    future.set_result(func(*args, **kwargs))
+    return future
+
+
+def queued_write(func, *args, **kwargs):
+    """Выполняет запись через очередь и ждёт её завершения.
+
+    После возврата запись закоммичена, поэтому страница, на которую
+    view перенаправит пользователя, её уже покажет. Если писатель не
+    успел за WRITE_QUEUE_TIMEOUT, ещё не начатая запись отменяется;
+    в обоих случаях поднимается WriteTimeoutError.
+    """
+    # Писатель работает в своём потоке, и роутер не узнает о записи.
+    stick_to_primary()
+    future = submit_write(func, *args, **kwargs)
+    try:
+        return future.result(timeout=settings.WRITE_QUEUE_TIMEOUT)
+    except TimeoutError:
+        pending = not future.cancel()
+        logger.warning('Запись не завершилась за %s с, %s',
+                       settings.WRITE_QUEUE_TIMEOUT,
+                       'ещё выполняется' if pending else 'отменена')
+        raise WriteTimeoutError(pending) from None
@@ -0,0 +1,154 @@
+"""JSON API лент и постов только для чтения.
+
+Ответы отдаются с ETag от их содержимого. ETag страницы ленты
+запоминается в кеше под текущей версией лент, поэтому повторный
+запрос с If-None-Match получает 304 без обращений к базе.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from core.routers import read_from_replica, replicas_synced_since
+
+from .cache import get_feed_version
+from .models import Group, Post, User
+from .paginators import CursorPaginator
+
+FEED_FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image', 'url')
+DETAIL_FIELDS = FEED_FIELDS + ('comment_count',)
+
+FIELD_GETTERS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'url': lambda post: reverse(
+        'posts:post_detail', kwargs={'post_id': post.pk}),
+    'comment_count': lambda post: post.comment_count,
+}
+
+
+def parse_fields(request, allowed):
+    """Поля из параметра ``fields``; None, если есть неизвестные."""
+    value = request.GET.get('fields')
+    if not value:
+        return allowed
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()))
+    if not fields or not set(fields) <= set(allowed):
+        return None
+    return fields
+
+
+def post_payload(post, fields):
+    return {name: FIELD_GETTERS[name](post) for name in fields}
+
+
+def fields_error(allowed):
+    return JsonResponse(
+        {'error': f'Допустимые поля: {", ".join(allowed)}'}, status=400)
+
+
+def json_response(request, data):
+    """Ответ с ETag от тела; 304, если клиент прислал тот же ETag."""
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    body = body.encode()
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    response = not_modified(request, etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        # Клиент хранит ответ, но перед показом сверяет ETag.
+        patch_cache_control(response, no_cache=True)
+    return response, etag
+
+
+def not_modified(request, etag):
+    if get_conditional_response(request, etag=etag) is None:
+        return None
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def feed_response(request, get_posts):
+    """Страница ленты по курсору ``after`` или ``before``.
+
+    ``get_posts`` вызывается, только если ответ не удалось
+    подтвердить по ETag из кеша. ETag ответа с не обновлённой реплики
+    не запоминается: иначе клиенты со старым телом получали бы 304.
+    """
+    fields = parse_fields(request, FEED_FIELDS)
+    if fields is None:
+        return fields_error(FEED_FIELDS)
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    version = get_feed_version()
+    key = f'api_etag:{version}:{path}'
+    etag = cache.get(key)
+    if etag is not None:
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+    paginator = CursorPaginator(
+        get_posts(),
+        settings.AMOUNT_OF_POSTS,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    page = paginator.page()
+    response, etag = json_response(request, {
+        'results': [post_payload(post, fields) for post in page],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    })
+    if replicas_synced_since(version):
+        cache.set(key, etag, settings.INDEX_PAGE_CACHE_TIMEOUT)
+    return response
+
+
+@read_from_replica
+def index(request):
+    """Главная лента."""
+    return feed_response(request, Post.objects.for_feed)
+
+
+@read_from_replica
+def group_posts(request, slug):
+    """Лента сообщества."""
+    def get_posts():
+        group = get_object_or_404(Group, slug=slug)
+        return Post.objects.for_feed().filter(group=group)
+    return feed_response(request, get_posts)
+
+
+@read_from_replica
+def profile(request, username):
+    """Лента автора."""
+    def get_posts():
+        author = get_object_or_404(User, username=username)
+        return Post.objects.for_feed().filter(author=author)
+    return feed_response(request, get_posts)
+
+
+def post_detail(request, post_id):
+    """Пост с числом комментариев."""
+    fields = parse_fields(request, DETAIL_FIELDS)
+    if fields is None:
+        return fields_error(DETAIL_FIELDS)
+    post = get_object_or_404(
+        Post.objects.for_feed().annotate(comment_count=Count('comments')),
+        pk=post_id,
+    )
+    response, _ = json_response(request, post_payload(post, fields))
+    return response
@@ -0,0 +1,234 @@
+import json
+import subprocess
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.budgets import Route
+
+from .models import AuthorStats, Post, User
+
+# Адреса, которые меняют данные даже на GET
+WRITE_ROUTES = {'posts:profile_follow', 'posts:profile_unfollow'}
+
+
+class EmptyDatabaseError(LookupError):
+    """В базе нет данных для подстановки в адреса."""
+
+
+def sample_objects():
+    """Объекты для подстановки в адреса: самые нагруженные случаи.
+
+    Автор — с наибольшим числом постов, читатель — с наибольшим
+    числом подписок, пост — последний пост автора. Посторонний
+    пользователь нигде не входит на сайт: вход меняет last_login,
+    и ссылка на сброс его пароля оставалась бы действительной.
+    Без нужных объектов выбрасывает EmptyDatabaseError.
+    """
+    stats = AuthorStats.objects.select_related('user')
+    author = stats.filter(posts_count__gt=0).order_by('-posts_count').first()
+    if author is None:
+        raise EmptyDatabaseError('В базе нет автора с постами.')
+    reader = stats.exclude(user=author.user).order_by(
+        '-following_count').first()
+    if reader is None:
+        raise EmptyDatabaseError('В базе нет второго пользователя.')
+    author, reader = author.user, reader.user
+    stranger = User.objects.exclude(pk__in=(author.pk, reader.pk)).first()
+    post = Post.objects.filter(author=author).order_by('-pub_date').first()
+    grouped = Post.objects.exclude(group=None).select_related(
+        'group').first()
+    if stranger is None or post is None or grouped is None:
+        raise EmptyDatabaseError(
+            'В базе нет третьего пользователя или поста в группе.')
+    group = grouped.group
+    return {
+        'author': author,
+        'reader': reader,
+        'stranger': stranger,
+        'post': post,
+        'group': group,
+        'word': post.text.split()[0],
+    }
+
+
+def posts_routes(sample):
+    """Все адреса posts.urls с данными для запроса."""
+    author, reader = sample['author'], sample['reader']
+    post_id = sample['post'].pk
+    return [
+        Route('posts:main_page'),
+        Route('posts:group_list', {'slug': sample['group'].slug}),
+        Route('posts:profile', {'username': author.username}),
+        Route('posts:post_detail', {'post_id': post_id}),
+        Route('posts:post_edit', {'post_id': post_id}, author),
+        Route('posts:search', data={'q': sample['word']}),
+        Route('posts:post_create', user=reader),
+        Route('posts:add_comment', {'post_id': post_id}, reader, 'post',
+              {'text': 'Комментарий'}),
+        Route('posts:follow_index', user=reader),
+        Route('posts:profile_follow', {'username': author.username},
+              reader),
+        Route('posts:profile_unfollow', {'username': author.username},
+              reader),
+        Route('posts:api_main_page'),
+        Route('posts:api_post_detail', {'post_id': post_id}),
+        Route('posts:api_group_list', {'slug': sample['group'].slug}),
+        Route('posts:api_profile', {'username': author.username}),
+    ]
+
+
+def site_routes(sample):
+    """Адреса posts.urls, users.urls и about.urls."""
+    reader, stranger = sample['reader'], sample['stranger']
+    return posts_routes(sample) + [
+        Route('users:signup'),
+        Route('users:login'),
+        Route('users:logout', user=reader),
+        Route('users:password_reset'),
+        Route('users:password_reset_done'),
+        Route('users:password_reset_confirm', {
+            'uidb64': urlsafe_base64_encode(force_bytes(stranger.pk)),
+            'token': default_token_generator.make_token(stranger),
+        }),
+        Route('users:password_reset_complete'),
+        Route('users:password_change', user=reader),
+        Route('users:password_change_done', user=reader),
+        Route('about:author'),
+        Route('about:tech'),
+    ]
+
+
+def percentile(values, percent):
+    """Перцентиль по ближайшему рангу."""
+    values = sorted(values)
+    index = max(round(percent / 100 * len(values)) - 1, 0)
+    return values[index]
+
+
+class QueryCounter:
+    """Обёртка для execute_wrapper, считающая запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def changes_data(route):
+    return route.method != 'get' or route.name in WRITE_ROUTES
+
+
+def measure(route, requests, warmup=1, cold=False):
+    """Замеряет один адрес: задержку, число запросов и размер ответа.
+
+    Меняющие данные адреса выполняются в транзакции, которая
+    откатывается, поэтому их можно гонять повторно; в ней чтение идёт
+    в основную базу, запись — мимо очереди, а on_commit не срабатывает.
+    Остальные адреса выполняются как в бою. Запросы считаются по всем
+    базам. С ``cold`` перед каждым запросом очищаются кеши.
+    """
+    client = Client()
+    if route.user is not None:
+        client.force_login(route.user)
+    path = reverse(route.name, kwargs=route.kwargs)
+    send = getattr(client, route.method)
+    timings = []
+    for number in range(warmup + requests):
+        if cold:
+            for alias in settings.CACHES:
+                caches[alias].clear()
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            if changes_data(route):
+                stack.enter_context(transaction.atomic())
+                # Выполнится первым на выходе, ещё внутри транзакции.
+                stack.callback(transaction.set_rollback, True)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            started = time.perf_counter()
+            response = send(path, route.data)
+            elapsed = time.perf_counter() - started
+        if number >= warmup:
+            timings.append(elapsed * 1000)
+    return {
+        'path': path,
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'queries': counter.count,
+        'bytes': len(response.content),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(routes, requests, warmup=1, cold=False, log=None):
+    """Прогоняет адреса через тестовый клиент; возвращает отчёт.
+
+    Панель отладки и поиск повторяющихся запросов на время замеров
+    выключены: в бою их нет.
+    """
+    log = log or (lambda message: None)
+    views = {}
+    with override_settings(DEBUG=False, QUERY_REPEAT_DETECTION=False):
+        for route in routes:
+            views[route.name] = measure(route, requests, warmup, cold)
+            log(format_line(route.name, views[route.name]))
+    return {
+        'commit': current_commit(),
+        'created': timezone.now().isoformat(),
+        'requests': requests,
+        'cold': cold,
+        'views': views,
+    }
+
+
+def format_line(name, result, previous=None):
+    line = (f'{name:<28} {result["status"]} '
+            f'p50 {result["p50_ms"]:>8.2f} мс  '
+            f'p95 {result["p95_ms"]:>8.2f} мс  '
+            f'{result["queries"]:>3} запр.  {result["bytes"]:>7} Б')
+    if previous:
+        line += (f'  (p50 {result["p50_ms"] - previous["p50_ms"]:+.2f} мс, '
+                 f'{result["queries"] - previous["queries"]:+d} запр.)')
+    return line
+
+
+def compare(report, baseline):
+    """Строки отчёта с разницей относительно прошлого прогона."""
+    previous = baseline.get('views', {})
+    return [
+        format_line(name, result, previous.get(name))
+        for name, result in report['views'].items()
+    ]
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
@@ -0,0 +1,56 @@
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.middleware.cache import CacheMiddleware
+
+from core import metrics
+from core.routers import replicas_synced_since
+
+FEED_VERSION_KEY = 'feed_version'
+
+
+def get_feed_version():
+    """Текущая версия содержимого лент."""
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        # Версия от времени не совпадёт с версией вытесненного ключа,
+        # поэтому старые страницы из кеша не всплывут.
+        cache.add(FEED_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(FEED_VERSION_KEY)
+    return version
+
+
+def bump_feed_version():
+    """Делает недействительными все страницы, закешированные ранее."""
+    cache.set(FEED_VERSION_KEY, time.time_ns(), None)
+
+
+def versioned_cache_page(timeout, key_prefix):
+    """Как cache_page, но ключ включает версию содержимого лент.
+
+    Страница, прочитанная с реплики, скопированной раньше этой версии,
+    в кеш не попадает: иначе устаревшая страница хранилась бы под новой
+    версией и доставалась бы всем, включая читающих из основной базы.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            version = get_feed_version()
+            middleware = CacheMiddleware(
+                cache_timeout=timeout,
+                key_prefix=f'{key_prefix}:{version}',
+            )
+            response = middleware.process_request(request)
+            hit = response is not None
+            if not hit:
+                response = view_func(request, *args, **kwargs)
+                if replicas_synced_since(version):
+                    response = middleware.process_response(
+                        request, response)
+            metrics.inc(
+                'yatube_page_cache_requests_total',
+                page=key_prefix, result='hit' if hit else 'miss')
+            return response
+        return wrapper
+    return decorator
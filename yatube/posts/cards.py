@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/includes/post_list.html'
+
+
+def card_key(post):
+    """Ключ карточки меняется вместе с постом, его автором и группой.
+
+    Автор и группа приходят в ленты через select_related, поэтому их
+    поля, выводимые в карточке, входят в ключ без лишних запросов.
+    """
+    author, group = post.author, post.group
+    shown = (
+        author.username, author.get_full_name(),
+        group.slug if group else '', group.title if group else '',
+    )
+    digest = hashlib.md5('\0'.join(shown).encode()).hexdigest()[:12]
+    return f'post_card:{post.pk}:{post.updated.timestamp()}:{digest}'
+
+
+def render_cards(posts):
+    """Возвращает пары (пост, html карточки) для страницы ленты.
+
+    Готовые карточки достаются из кеша одним get_many, недостающие
+    рендерятся и сохраняются одним set_many.
+    """
+    posts = {card_key(post): post for post in posts}
+    cards = cache.get_many(posts.keys())
+    missing = [key for key in posts if key not in cards]
+    # Варианты картинок нужны только карточкам, которых нет в кеше.
+    prefetch_related_objects(
+        [posts[key] for key in missing if posts[key].image],
+        'image_variants',
+    )
+    missing = {
+        key: render_to_string(CARD_TEMPLATE, {'post': posts[key]})
+        for key in missing
+    }
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [(post, mark_safe(cards[key])) for key, post in posts.items()]
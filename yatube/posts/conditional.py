@@ -0,0 +1,92 @@
+"""Условные GET для страниц поста, сообщества и профиля.
+
+Объект страницы выбирается одним запросом вместе с датами изменения
+постов и комментариев и счётчиками, которые выводит шаблон. Из них
+получается ETag; если клиент прислал тот же, ему отдаётся 304 ещё до
+выборки постов и рендеринга шаблона. Иначе view берёт уже выбранный
+объект из ``page_object``.
+
+Last-Modified не отдаётся: наибольшая дата изменения не уменьшается
+при удалении поста или комментария и не меняется при подписке, и
+клиент с одним If-Modified-Since получил бы устаревшую страницу.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import Http404
+from django.views.decorators.http import condition
+
+from .follow_graph import following_ids, is_following
+from .models import Group, Post, User
+from .stats import get_stats
+
+
+def post_state(request, post_id):
+    post = Post.objects.for_detail().prefetch_related(None).annotate(
+        last_comment=Max('comments__created'),
+    ).filter(pk=post_id).first()
+    if post is None:
+        return None
+    return post, (
+        post.updated, post.last_comment, post.comment_count,
+        get_stats(post.author).posts_count,
+    )
+
+
+def group_state(request, slug):
+    group = Group.objects.annotate(
+        last_post=Max('posts__updated'),
+        post_count=Count('posts'),
+    ).filter(slug=slug).first()
+    if group is None:
+        return None
+    # Карточки отмечают авторов, на которых подписан пользователь.
+    following = following_ids(request.user.pk)
+    return group, (
+        group.last_post, group.post_count, group.title, group.description,
+        following.tobytes(),
+    )
+
+
+def profile_state(request, username):
+    author = User.objects.select_related('stats').annotate(
+        last_post=Max('posts__updated'),
+    ).filter(username=username).first()
+    if author is None:
+        return None
+    author.is_followed = is_following(request.user.pk, author.pk)
+    stats = get_stats(author)
+    return author, (
+        author.last_post, author.is_followed, author.get_full_name(),
+        stats.posts_count, stats.followers_count, stats.following_count,
+    )
+
+
+def page_object(request):
+    """Объект страницы, выбранный conditional_page, или 404."""
+    if request.page_state is None:
+        raise Http404
+    return request.page_state[0]
+
+
+def conditional_page(get_state):
+    """Как condition, но ETag берётся из одного запроса с объектом.
+
+    ``get_state`` возвращает None, если объекта нет, или пару из
+    объекта и значений, от которых зависит страница. Страница выглядит
+    по-разному для разных пользователей, поэтому ETag включает id
+    пользователя, а обращение к сессии добавляет к ответу Vary: Cookie.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, 'page_state'):
+            request.page_state = get_state(request, *args, **kwargs)
+        return request.page_state
+
+    def etag(request, *args, **kwargs):
+        page = state(request, *args, **kwargs)
+        if page is None:
+            return None
+        value = repr((page[1], request.user.pk)).encode()
+        return hashlib.md5(value).hexdigest()
+
+    return condition(etag_func=etag)
@@ -0,0 +1,34 @@
+from .models import FeedItem, Follow, Post
+
+FEED_BATCH_SIZE = 500
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам всех подписчиков автора."""
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, author_id=post.author_id,
+                  post=post, pub_date=post.pub_date)
+         for user_id in follower_ids.iterator()),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id).values_list('pk', 'pub_date')
+    FeedItem.objects.bulk_create(
+        (FeedItem(user_id=user_id, author_id=author_id,
+                  post_id=post_id, pub_date=pub_date)
+         for post_id, pub_date in posts.iterator()),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def prune_feed(user_id, author_id):
+    """Убирает из ленты подписчика посты автора после отписки."""
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
@@ -0,0 +1,98 @@
+"""Граф подписок в кеше.
+
+Для каждого пользователя в кеше лежит отсортированный массив id
+авторов, на которых он подписан, в виде байтов array('q'): восемь
+байт на подписку. Проверка подписки — двоичный поиск по массиву.
+Запись сбрасывается при подписке и отписке.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+TYPECODE = 'q'
+
+
+def following_key(user_id):
+    return f'following:{user_id}'
+
+
+class FollowedAuthors:
+    """Отсортированные id авторов, на которых подписан пользователь."""
+    __slots__ = ('ids',)
+
+    def __init__(self, ids=None):
+        self.ids = ids if ids is not None else array(TYPECODE)
+
+    def __contains__(self, author_id):
+        index = bisect_left(self.ids, author_id)
+        return index < len(self.ids) and self.ids[index] == author_id
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def tobytes(self):
+        return self.ids.tobytes()
+
+
+def _unpack(data):
+    ids = array(TYPECODE)
+    ids.frombytes(data)
+    return FollowedAuthors(ids)
+
+
+def following_many(user_ids):
+    """Подписки нескольких пользователей: словарь id -> FollowedAuthors.
+
+    Кеш читается одним get_many, промахи догружаются одним запросом
+    по индексу (user, author) и сохраняются одним set_many. Промахи
+    читаются из основной базы: набор живёт в кеше сутки, и отставшая
+    реплика надолго спрятала бы свежую подписку.
+    """
+    keys = {following_key(user_id): user_id
+            for user_id in user_ids if user_id is not None}
+    cached = cache.get_many(keys)
+    result = {keys[key]: _unpack(data) for key, data in cached.items()}
+    missing = [user_id for key, user_id in keys.items() if key not in cached]
+    if not missing:
+        return result
+    loaded = {user_id: array(TYPECODE) for user_id in missing}
+    rows = Follow.objects.using('default').filter(
+        user_id__in=missing).order_by(
+        'user_id', 'author_id').values_list('user_id', 'author_id')
+    for user_id, author_id in rows.iterator():
+        loaded[user_id].append(author_id)
+    cache.set_many(
+        {following_key(user_id): ids.tobytes()
+         for user_id, ids in loaded.items()},
+        settings.FOLLOWING_CACHE_TIMEOUT,
+    )
+    result.update(
+        (user_id, FollowedAuthors(ids)) for user_id, ids in loaded.items())
+    return result
+
+
+def following_ids(user_id):
+    """Авторы, на которых подписан пользователь; гостю — пустой набор."""
+    if user_id is None:
+        return FollowedAuthors()
+    return following_many([user_id])[user_id]
+
+
+def is_following(user_id, author_id):
+    return author_id in following_ids(user_id)
+
+
+def invalidate_following(user_id):
+    key = following_key(user_id)
+    cache.delete(key)
+    # И ещё раз после коммита: до него параллельный запрос мог снова
+    # положить в кеш подписки без этой записи.
+    transaction.on_commit(lambda: cache.delete(key))
@@ -27,3 +27,9 @@ class CommentForm(forms.ModelForm):
         labels = {
             'text': 'Текст комментария',
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Поиск', max_length=200, required=False)
+    group = forms.CharField(label='Группа', required=False)
+    author = forms.CharField(label='Автор', required=False)
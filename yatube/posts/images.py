@@ -0,0 +1,102 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_feed_version
+from .models import Post, PostImageVariant
+
+# Кадрирование совпадает с миниатюрами из posts/thumbnails.py
+IMAGE_PRESETS = {
+    'feed': {
+        'size': (960, 339),
+        'widths': (320, 640, 960),
+        'sizes': '(max-width: 960px) 100vw, 960px',
+    },
+    'detail': {
+        'size': (600, 600),
+        'widths': (300, 600),
+        'sizes': '(max-width: 600px) 100vw, 600px',
+    },
+}
+IMAGE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'jpeg': {'format': 'JPEG', 'quality': 85, 'optimize': True,
+             'progressive': True},
+}
+
+
+def _encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    image.save(buffer, **IMAGE_FORMATS[image_format])
+    return buffer.getvalue()
+
+
+def build_variants(post):
+    """Пересоздаёт все варианты картинки поста по пресетам."""
+    for variant in post.image_variants.all():
+        variant.image.delete(save=False)
+    post.image_variants.all().delete()
+    if not post.image:
+        return []
+    with post.image.open('rb') as file:
+        source = ImageOps.exif_transpose(Image.open(file))
+        source.load()
+    if source.mode not in ('RGB', 'RGBA'):
+        source = source.convert('RGBA')
+    variants = []
+    for preset, options in IMAGE_PRESETS.items():
+        box_width, box_height = options['size']
+        for width in options['widths']:
+            size = (width, round(width * box_height / box_width))
+            resized = ImageOps.fit(source, size, Image.LANCZOS)
+            for image_format in IMAGE_FORMATS:
+                variant = PostImageVariant(
+                    post=post,
+                    preset=preset,
+                    format=image_format,
+                    width=size[0],
+                    height=size[1],
+                )
+                variant.image.save(
+                    f'{post.pk}/{preset}-{width}.{image_format}',
+                    ContentFile(_encode(resized, image_format)),
+                    save=False,
+                )
+                variants.append(variant)
+    with transaction.atomic():
+        PostImageVariant.objects.bulk_create(variants)
+        # Новая дата изменения сбрасывает закешированную карточку поста,
+        # новая версия лент — страницы, закешированные со старой.
+        # update() не шлёт сигналов, поэтому версия меняется здесь.
+        Post.objects.filter(pk=post.pk).update(updated=timezone.now())
+        transaction.on_commit(bump_feed_version)
+    return variants
+
+
+def picture_sources(post, preset):
+    """Данные для <picture>: srcset по форматам и запасная картинка."""
+    variants = [
+        variant for variant in post.image_variants.all()
+        if variant.preset == preset
+    ]
+    if not variants:
+        return None
+    srcset = {}
+    for variant in variants:
+        srcset.setdefault(variant.format, []).append(
+            f'{variant.image.url} {variant.width}w')
+    fallback = max(
+        (variant for variant in variants if variant.format == 'jpeg'),
+        key=lambda variant: variant.width,
+    )
+    return {
+        'webp': ', '.join(srcset.get('webp', ())),
+        'jpeg': ', '.join(srcset.get('jpeg', ())),
+        'sizes': IMAGE_PRESETS[preset]['sizes'],
+        'fallback': fallback,
+    }
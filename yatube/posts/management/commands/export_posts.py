@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (
+    TRANSFER_BATCH_SIZE, export_posts, format_report, open_stream)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии '
+            'и подписки в формате JSON Lines.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл выгрузки; «-» — стандартный вывод.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            default=None,
+            help='Сжать выгрузку; для файлов .gz включено всегда.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=TRANSFER_BATCH_SIZE,
+            help='Сколько строк читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with open_stream(options['path'], 'w', options['gzip']) as stream:
+            counts = export_posts(stream, options['chunk_size'])
+        self.stderr.write(self.style.SUCCESS(format_report(
+            'Выгружено', counts, time.monotonic() - started)))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import (
+    TRANSFER_BATCH_SIZE, format_report, import_posts, open_stream)
+
+
+class Command(BaseCommand):
+    help = 'Загружает выгрузку export_posts пачками через bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл выгрузки; «-» — стандартный ввод.',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            default=None,
+            help='Выгрузка сжата; для файлов .gz включено всегда.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=TRANSFER_BATCH_SIZE,
+            help='Сколько строк записывать одним запросом.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with open_stream(options['path'], 'r', options['gzip']) as stream:
+            counts = import_posts(stream, options['batch_size'])
+        self.stderr.write(self.style.SUCCESS(format_report(
+            'Загружено', counts, time.monotonic() - started)))
+        self.stderr.write(
+            'Миниатюры картинок создаёт команда pregenerate_thumbnails.')
@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import process_post_image
+
+
+def _init_worker():
+    # Соединения с базой нельзя делить между процессами.
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = ('Создаёт миниатюры и варианты для srcset '
+            'уже загруженных картинок постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Число процессов; по умолчанию — по числу ядер.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20,
+            help='Сколько картинок отдавать процессу за раз.',
+        )
+
+    def handle(self, *args, **options):
+        post_ids = list(
+            Post.objects.exclude(image='')
+            .values_list('pk', flat=True).iterator()
+        )
+        connections.close_all()
+        started = time.monotonic()
+        done = 0
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 initializer=_init_worker) as pool:
+            results = pool.map(process_post_image, post_ids,
+                               chunksize=options['chunk_size'])
+            for done, post_id in enumerate(results, start=1):
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Пост {post_id}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры созданы для {done} картинок '
+            f'за {time.monotonic() - started:.1f} с.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import (ACTIVITY_DAYS, RECOMMENDATIONS_PER_USER,
+                                   refresh_recommendations)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации «Кого почитать» по графу подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=RECOMMENDATIONS_PER_USER,
+            help='Сколько рекомендаций хранить для пользователя.',
+        )
+        parser.add_argument(
+            '--activity-days',
+            type=int,
+            default=ACTIVITY_DAYS,
+            help='За сколько дней считать активность авторов.',
+        )
+
+    def handle(self, *args, **options):
+        users, total = refresh_recommendations(
+            top=options['top'], activity_days=options['activity_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Сохранено {total} рекомендаций для {users} пользователей.'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import STATS_BATCH_SIZE, recount_all_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, подписчиков и подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=STATS_BATCH_SIZE,
+            help='Сколько пользователей пересчитывать за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        total = recount_all_stats(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитаны счётчики {total} пользователей.'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import (EmptyDatabaseError, compare, load_report,
+                             posts_routes, run_benchmark, sample_objects,
+                             save_report)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержку, число запросов и размер ответа '
+            'для всех адресов posts.urls и пишет отчёт в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=20,
+            help='Сколько запросов на адрес учитывать.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=2,
+            help='Сколько первых запросов не учитывать.',
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Очищать кеши перед каждым запросом.',
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='Куда записать отчёт.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Отчёт прошлого прогона для сравнения.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            routes = posts_routes(sample_objects())
+        except EmptyDatabaseError as error:
+            raise CommandError(
+                f'{error} Сначала заполните базу: manage.py seed_benchmark.')
+        log = None if options['compare'] else self.stdout.write
+        report = run_benchmark(
+            routes, options['requests'], options['warmup'],
+            options['cold'], log=log,
+        )
+        save_report(report, options['output'])
+        if options['compare']:
+            baseline = load_report(options['compare'])
+            self.stdout.write(
+                f'Сравнение с {baseline.get("commit") or options["compare"]}')
+            for line in compare(report, baseline):
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Отчёт записан в {options["output"]}.'))
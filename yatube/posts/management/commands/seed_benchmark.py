@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import SEED_BATCH_SIZE, Seeder
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу синтетическими пользователями, группами, '
+            'постами, комментариями и подписками для замеров. '
+            'Запускайте на отдельной базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=200000,
+            help='Примерное общее число подписок.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SEED_BATCH_SIZE,
+            help='Сколько строк записывать одним запросом.',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Зерно генератора для воспроизводимых данных.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        seeder = Seeder(
+            users=options['users'],
+            posts=options['posts'],
+            groups=options['groups'],
+            comments=options['comments'],
+            follows=options['follows'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        seeder.run(log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f'База наполнена за {time.monotonic() - started:.1f} с.'))
@@ -15,6 +15,41 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Выборка для лент: автор и группа приходят одним запросом."""
+        return self.select_related('author', 'group')
+
+    def for_follow_feed(self, user):
+        """Лента подписок пользователя из его материализованной ленты.
+
+        Дата и id берутся из записи ленты через тот же JOIN, что и
+        фильтр: сортировка и курсор по ним идут индексом
+        feed_user_pub_date_idx без отдельной сортировки.
+        """
+        return self.for_feed().filter(feed_items__user=user).annotate(
+            feed_pub_date=models.F('feed_items__pub_date'),
+            feed_item_id=models.F('feed_items__id'),
+        ).order_by('-feed_pub_date', '-feed_item_id')
+
+    def for_detail(self):
+        """Выборка для страницы поста: с комментариями и их авторами."""
+        return self.select_related('author__stats', 'group').annotate(
+            comment_count=models.Count('comments'),
+        ).prefetch_related(*self.detail_prefetch())
+
+    @staticmethod
+    def detail_prefetch():
+        """Связанные объекты страницы поста."""
+        return (
+            models.Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('author'),
+            ),
+            'image_variants',
+        )
+
+
 class Post(CreatedModel):
     text = models.TextField(
         'Текст поста',
@@ -40,12 +75,34 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True,
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        # Ленты упорядочены по (pub_date, id) от новых к старым:
+        # с id в индексе SQLite не досортировывает страницу.
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -73,6 +130,14 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -89,9 +154,123 @@ class Follow(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'user'],
                 name='unique_follow_user'
             )
         ]
+
+
+class FeedItem(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пост',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-id'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_item'
+            )
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики постов, подписчиков и подписок пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0
+    )
+
+
+class PostImageVariant(models.Model):
+    """Уменьшенная копия картинки поста для атрибута srcset."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+        verbose_name='Пост',
+    )
+    preset = models.CharField('Назначение', max_length=16)
+    format = models.CharField('Формат', max_length=8)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    image = models.ImageField('Картинка', upload_to='posts/variants/')
+
+    class Meta:
+        ordering = ['preset', 'format', 'width']
+
+
+class Recommendation(models.Model):
+    """Автор, на которого пользователю стоит подписаться."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    score = models.FloatField('Вес')
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='recommendation_user_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_recommendation'
+            )
+        ]
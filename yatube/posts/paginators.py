@@ -0,0 +1,186 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+def encode_cursor(post, keys=('pub_date', 'pk')):
+    """Упаковывает ключ (дата, id) поста в непрозрачный токен."""
+    date_key, pk_key = keys
+    value = f'{getattr(post, date_key).isoformat()}|{getattr(post, pk_key)}'
+    return urlsafe_base64_encode(value.encode())
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        pub_date, pk = urlsafe_base64_decode(token).decode().split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (pub_date, id): без OFFSET и COUNT(*).
+
+    Страница определяется токеном ``after`` (посты старше курсора)
+    или ``before`` (посты новее курсора). Без токенов отдаётся первая
+    страница ленты.
+
+    ``keys`` — имена даты и id, по которым идёт курсор. Лента подписок
+    передаёт аннотации с полями своей записи, чтобы курсор шёл по
+    индексу ленты, а не сортировал все её посты.
+    """
+    is_cursor = True
+    keys = ('pub_date', 'pk')
+
+    def __init__(self, object_list, per_page, after=None, before=None,
+                 keys=None):
+        super().__init__(object_list, per_page)
+        if keys is not None:
+            self.keys = keys
+        self.after = decode_cursor(after)
+        self.before = None if self.after else decode_cursor(before)
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def get_page(self, number=None):
+        return self.page(number)
+
+    def page(self, number=None):
+        queryset = self.object_list
+        date_key, pk_key = self.keys
+        if self.before:
+            pub_date, pk = self.before
+            queryset = queryset.filter(
+                Q(**{f'{date_key}__gt': pub_date})
+                | Q(**{date_key: pub_date, f'{pk_key}__gt': pk})
+            ).order_by(date_key, pk_key)
+        else:
+            if self.after:
+                pub_date, pk = self.after
+                queryset = queryset.filter(
+                    Q(**{f'{date_key}__lt': pub_date})
+                    | Q(**{date_key: pub_date, f'{pk_key}__lt': pk})
+                )
+            queryset = queryset.order_by(f'-{date_key}', f'-{pk_key}')
+        # Лишняя строка показывает, есть ли записи дальше по курсору.
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if self.before:
+            objects.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = bool(self.after), has_more
+        if objects:
+            if has_previous:
+                self.previous_cursor = encode_cursor(objects[0], self.keys)
+            if has_next:
+                self.next_cursor = encode_cursor(objects[-1], self.keys)
+        # Номер страницы условный: он нужен только для has_next() и
+        # has_previous() у Page и не требует подсчёта всех записей.
+        number = 2 if has_previous else 1
+        self.num_pages = number + 1 if has_next else number
+        return Page(objects, number, self)
+
+
+def refresh_count(key, queryset):
+    """Пересчитывает число записей выборки и кладёт его в кеш."""
+    count = queryset.count()
+    cache.set(key, (count, time.time()), settings.PAGINATOR_COUNT_TIMEOUT)
+    return count
+
+
+def _refresh_count_in_background(key, queryset):
+    try:
+        refresh_count(key, queryset)
+    finally:
+        cache.delete(f'{key}:lock')
+        connection.close()
+
+
+class WindowPaginator(Paginator):
+    """Постраничный пагинатор без обязательного COUNT(*).
+
+    Число записей берётся из кеша и обновляется в фоновом потоке,
+    когда устаревает. Пока его нет, наличие следующей страницы
+    определяется по лишней (N+1) строке выборки. Шаблону отдаётся
+    только окно номеров вокруг текущей страницы.
+    """
+    window = 2
+
+    def __init__(self, object_list, per_page, window=None):
+        super().__init__(object_list, per_page)
+        if window is not None:
+            self.window = window
+        self.page_window = range(1, 2)
+
+    @cached_property
+    def count_key(self):
+        query = str(self.object_list.query).encode()
+        return f'paginator_count:{hashlib.md5(query).hexdigest()}'
+
+    @cached_property
+    def count(self):
+        cached = cache.get(self.count_key)
+        if not settings.PAGINATOR_COUNT_IN_BACKGROUND:
+            if cached is None:
+                return refresh_count(self.count_key, self.object_list)
+            return cached[0]
+        if cached is None or (
+                time.time() - cached[1] > settings.PAGINATOR_COUNT_TTL):
+            self.schedule_count_refresh()
+        if cached is None:
+            return None
+        return cached[0]
+
+    def schedule_count_refresh(self):
+        if not cache.add(f'{self.count_key}:lock', True,
+                         settings.PAGINATOR_COUNT_TTL):
+            return
+        threading.Thread(
+            target=_refresh_count_in_background,
+            args=(self.count_key, self.object_list),
+            daemon=True,
+        ).start()
+
+    def get_page(self, number):
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        if self.count is not None:
+            page = super().get_page(number)
+        else:
+            try:
+                page = self._page_without_count(number)
+            except EmptyPage:
+                page = self._page_without_count(1)
+        self.page_window = range(
+            max(page.number - self.window, 1),
+            min(page.number + self.window, self.num_pages) + 1,
+        )
+        return page
+
+    def _page_without_count(self, number):
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage('That page contains no results')
+        self.num_pages = number + 1 if len(objects) > self.per_page else number
+        return Page(objects[:self.per_page], number, self)
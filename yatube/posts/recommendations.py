@@ -0,0 +1,118 @@
+"""Рекомендации «на кого подписаться» по графу подписок.
+
+Граф загружается в память как разреженная матрица смежности в формате
+CSR на массивах array: ``indptr[i]:indptr[i + 1]`` — срез ``indices``
+с номерами авторов, на которых подписан пользователь ``nodes[i]``.
+Кандидаты — авторы в двух шагах по графу; вес кандидата — число путей
+до него, умноженное на активность автора за последние дни. Готовые
+рекомендации хранятся в таблице Recommendation, и страница читает их
+без обращений к графу.
+"""
+import heapq
+import math
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Follow, Post, Recommendation, User
+
+RECOMMENDATIONS_PER_USER = 10
+ACTIVITY_DAYS = 30
+RECOMMENDATION_BATCH_SIZE = 5000
+
+
+class FollowGraph:
+    """Граф подписок в формате CSR."""
+
+    def __init__(self, nodes, indptr, indices):
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def load(cls):
+        """Читает пользователей и подписки двумя потоковыми запросами."""
+        nodes = array('q', User.objects.order_by('pk').values_list(
+            'pk', flat=True).iterator())
+        indptr = array('q', [0])
+        indices = array('q')
+        rows = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id')
+        for user_id, author_id in rows.iterator():
+            row = bisect_left(nodes, user_id)
+            while len(indptr) <= row:
+                indptr.append(len(indices))
+            indices.append(bisect_left(nodes, author_id))
+        while len(indptr) <= len(nodes):
+            indptr.append(len(indices))
+        return cls(nodes, indptr, indices)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def following(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def activity(self, days):
+        """Вес автора: логарифм числа его постов за последние дни."""
+        weights = array('d', bytes(8 * len(self.nodes)))
+        since = timezone.now() - timedelta(days=days)
+        counts = Post.objects.filter(pub_date__gte=since).order_by(
+        ).values_list('author_id').annotate(count=Count('pk'))
+        for author_id, count in counts.iterator():
+            weights[bisect_left(self.nodes, author_id)] = math.log1p(count)
+        return weights
+
+    def recommend(self, row, weights, top):
+        """Лучшие кандидаты в двух шагах: пары (номер автора, вес)."""
+        following = self.following(row)
+        paths = defaultdict(int)
+        for middle in following:
+            for candidate in self.following(middle):
+                paths[candidate] += 1
+        skip = set(following)
+        skip.add(row)
+        scored = (
+            (count * weights[candidate], -candidate)
+            for candidate, count in paths.items()
+            if candidate not in skip and weights[candidate]
+        )
+        return [(-candidate, score)
+                for score, candidate in heapq.nlargest(top, scored)]
+
+
+def refresh_recommendations(top=RECOMMENDATIONS_PER_USER,
+                            activity_days=ACTIVITY_DAYS,
+                            batch_size=RECOMMENDATION_BATCH_SIZE):
+    """Пересчитывает рекомендации всех пользователей.
+
+    Рекомендации считаются целиком до транзакции: SQLite держит
+    единственную блокировку записи от DELETE до коммита, и долгий
+    расчёт внутри неё останавливал бы все остальные записи. Сама
+    транзакция только заменяет старые строки новыми. Возвращает число
+    пользователей в графе и число записанных рекомендаций.
+    """
+    graph = FollowGraph.load()
+    weights = graph.activity(activity_days)
+    rows = [
+        Recommendation(
+            user_id=graph.nodes[row],
+            author_id=graph.nodes[candidate],
+            score=score,
+        )
+        for row in range(len(graph))
+        for candidate, score in graph.recommend(row, weights, top)
+    ]
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        for start in range(0, len(rows), batch_size):
+            # Пачка делится на INSERT'ы самим Django: у SQLite есть
+            # лимит строк и параметров на один запрос.
+            Recommendation.objects.bulk_create(
+                rows[start:start + batch_size])
+    return len(graph), len(rows)
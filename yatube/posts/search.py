@@ -0,0 +1,129 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.safestring import mark_safe
+
+from .models import Group, Post, User
+
+FTS_TABLE = 'posts_post_fts'
+SNIPPET_TOKENS = 24
+
+# Границы найденных слов в сниппете: текст поста экранируется
+# целиком, а уже потом маркеры заменяются на <mark>.
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в запрос MATCH для FTS5.
+
+    Каждое слово ищется по префиксу, все слова обязательны. Операторы
+    FTS5 из ввода не пропускаются. Для пустого ввода возвращает None.
+    """
+    terms = re.findall(r'\w+', query or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def filter_by_match(queryset, query):
+    """Оставляет в выборке постов только найденные по индексу."""
+    match = match_expression(query)
+    if match is None:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,),
+    ))
+
+
+def encode_cursor(rank, pk):
+    """Упаковывает ключ (rank, id) результата поиска в токен."""
+    return urlsafe_base64_encode(f'{rank!r}|{pk}'.encode())
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        rank, pk = urlsafe_base64_decode(token).decode().split('|')
+        return float(rank), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def highlight(snippet):
+    """Экранирует сниппет и выделяет найденные слова тегом <mark>."""
+    html = escape(snippet)
+    html = html.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+def search_posts(query, limit, group=None, author=None, after=None):
+    """Ищет посты по тексту: сначала самые релевантные.
+
+    ``group`` — slug группы, ``author`` — имя пользователя, ``after`` —
+    токен последнего результата предыдущей страницы. Возвращает посты
+    со сниппетами в атрибуте ``snippet`` и токен следующей страницы.
+    """
+    match = match_expression(query)
+    if match is None:
+        return [], None
+    conditions = [f'{FTS_TABLE} MATCH %s']
+    params = [match]
+    if group:
+        conditions.append(
+            f'p.group_id = (SELECT id FROM {Group._meta.db_table} '
+            'WHERE slug = %s)'
+        )
+        params.append(group)
+    if author:
+        conditions.append(
+            f'p.author_id = (SELECT id FROM {User._meta.db_table} '
+            'WHERE username = %s)'
+        )
+        params.append(author)
+    cursor = decode_cursor(after)
+    if cursor:
+        conditions.append(
+            f'(rank > %s OR (rank = %s AND {FTS_TABLE}.rowid < %s))')
+        params.extend([cursor[0], cursor[0], cursor[1]])
+    # Сниппеты строятся только для строк текущей страницы, а не для
+    # всех совпадений, которые приходится ранжировать.
+    sql = f"""
+        SELECT page.id, page.rank,
+               snippet({FTS_TABLE}, 0, %s, %s, '…', {SNIPPET_TOKENS})
+        FROM {FTS_TABLE}
+        JOIN (
+            SELECT {FTS_TABLE}.rowid AS id, rank
+            FROM {FTS_TABLE}
+            JOIN {Post._meta.db_table} p ON p.id = {FTS_TABLE}.rowid
+            WHERE {' AND '.join(conditions)}
+            ORDER BY rank, {FTS_TABLE}.rowid DESC
+            LIMIT %s
+        ) page ON page.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s
+        ORDER BY page.rank, page.id DESC
+    """
+    params = [_MARK_START, _MARK_END, *params, limit + 1, match]
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    posts = Post.objects.for_feed().in_bulk([row[0] for row in rows])
+    results = []
+    for pk, rank, snippet in rows:
+        post = posts.get(pk)
+        if post is None:
+            continue
+        post.snippet = highlight(snippet)
+        results.append(post)
+    next_cursor = None
+    if has_next and rows:
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return results, next_cursor
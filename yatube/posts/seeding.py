@@ -0,0 +1,194 @@
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from .cache import bump_feed_version
+from .models import Comment, FeedItem, Follow, Group, Post, User
+from .stats import recount_all_stats
+from .transfer import keep_dates
+
+SEED_PREFIX = 'bench_'
+SEED_GROUP_PREFIX = 'bench-'
+SEED_BATCH_SIZE = 5000
+# Показатель степенного закона: чем больше, тем сильнее популярность
+# сосредоточена у немногих авторов.
+ZIPF_EXPONENT = 1.1
+TEXT_POOL_SIZE = 1000
+
+
+def zipf_weights(size, exponent=ZIPF_EXPONENT):
+    """Накопленные веса закона Ципфа для ``size`` элементов."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0) + 1
+
+
+class Seeder:
+    """Наполняет базу синтетическими данными для замеров.
+
+    Всё пишется через bulk_create пачками. Авторство постов и
+    подписки распределены по закону Ципфа: у немногих авторов много
+    постов и подписчиков, у большинства — единицы. Производные данные
+    (ленты подписок и счётчики) строятся одним проходом в конце.
+    """
+
+    def __init__(self, users, posts, groups, comments, follows,
+                 batch_size=SEED_BATCH_SIZE, seed=None):
+        self.counts = {
+            'users': users,
+            'posts': posts,
+            'groups': groups,
+            'comments': comments,
+            'follows': follows,
+        }
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        if seed is not None:
+            self.faker.seed_instance(seed)
+        # Faker медленный: тексты берутся из заранее созданного пула.
+        self.texts = [
+            self.faker.paragraph(nb_sentences=self.random.randint(1, 6))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        self.user_ids = []
+        self.group_ids = []
+        self.post_ids = range(0)
+
+    def run(self, log=None):
+        log = log or (lambda message: None)
+        with transaction.atomic():
+            for step in ('users', 'groups', 'posts', 'comments', 'follows'):
+                getattr(self, f'create_{step}')()
+                log(f'{step}: {self.counts[step]}')
+            self.build_feeds()
+            log('ленты подписок построены')
+            recount_all_stats()
+            transaction.on_commit(bump_feed_version)
+
+    def _bulk_create(self, model, objs, **kwargs):
+        # Пачки делятся на INSERT'ы самим Django: у SQLite есть лимит
+        # строк и параметров на один запрос.
+        for batch in _batches(objs, self.batch_size):
+            model.objects.bulk_create(batch, **kwargs)
+
+    def create_users(self):
+        password = make_password(None)
+        start = _next_pk(User)
+        self._bulk_create(User, (
+            User(username=f'{SEED_PREFIX}{start + number}',
+                 first_name=self.faker.first_name(),
+                 last_name=self.faker.last_name(),
+                 password=password)
+            for number in range(self.counts['users'])
+        ))
+        self.user_ids = list(User.objects.filter(
+            username__startswith=SEED_PREFIX,
+            pk__gte=start,
+        ).order_by('pk').values_list('pk', flat=True))
+        # Популярность не должна совпадать с порядком id.
+        self.random.shuffle(self.user_ids)
+        self.user_weights = zipf_weights(len(self.user_ids))
+
+    def create_groups(self):
+        start = _next_pk(Group)
+        self._bulk_create(Group, (
+            Group(title=self.faker.catch_phrase(),
+                  slug=f'{SEED_GROUP_PREFIX}{start + number}',
+                  description=self.random.choice(self.texts))
+            for number in range(self.counts['groups'])
+        ))
+        self.group_ids = list(Group.objects.filter(
+            pk__gte=start).values_list('pk', flat=True))
+
+    def create_posts(self):
+        start = _next_pk(Post)
+        self.post_ids = range(start, start + self.counts['posts'])
+        now = timezone.now()
+        with keep_dates(Post._meta.get_field('pub_date')):
+            for batch in _batches(self.post_ids, self.batch_size):
+                authors = self.random.choices(
+                    self.user_ids, cum_weights=self.user_weights,
+                    k=len(batch))
+                Post.objects.bulk_create(
+                    Post(pk=pk,
+                         author_id=author_id,
+                         group_id=self._random_group(),
+                         text=self.random.choice(self.texts),
+                         pub_date=now - timedelta(
+                             seconds=self.random.randint(0, 365 * 86400)))
+                    for pk, author_id in zip(batch, authors)
+                )
+
+    def _random_group(self):
+        # Примерно половина постов публикуется вне групп.
+        if not self.group_ids or self.random.random() < 0.5:
+            return None
+        return self.random.choice(self.group_ids)
+
+    def create_comments(self):
+        if not self.post_ids:
+            return
+        comments = (
+            Comment(post_id=self.random.choice(self.post_ids),
+                    author_id=self.random.choice(self.user_ids),
+                    text=self.faker.sentence())
+            for _ in range(self.counts['comments'])
+        )
+        self._bulk_create(Comment, comments)
+
+    def create_follows(self):
+        """Каждый подписывается на случайных авторов, чаще популярных."""
+        if len(self.user_ids) < 2:
+            return
+        average = self.counts['follows'] / len(self.user_ids)
+        follows = (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in self.user_ids
+            for author_id in set(self.random.choices(
+                self.user_ids, cum_weights=self.user_weights,
+                k=self._follow_count(average)))
+            if author_id != user_id
+        )
+        self._bulk_create(Follow, follows, ignore_conflicts=True)
+
+    def _follow_count(self, average):
+        # Число подписок тоже с тяжёлым хвостом, в среднем ``average``.
+        alpha = 2.0
+        count = average * (alpha - 1) / alpha * self.random.paretovariate(
+            alpha)
+        return min(int(count), len(self.user_ids) - 1)
+
+    def build_feeds(self):
+        """Раскладывает посты по лентам подписчиков одним запросом."""
+        feed = FeedItem._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR IGNORE INTO {feed} '
+                '(user_id, author_id, post_id, pub_date) '
+                'SELECT follow.user_id, post.author_id, post.id, '
+                'post.pub_date '
+                f'FROM {Follow._meta.db_table} follow '
+                f'JOIN {Post._meta.db_table} post '
+                'ON post.author_id = follow.author_id '
+                'WHERE post.id BETWEEN %s AND %s',
+                [self.post_ids.start, self.post_ids.stop - 1],
+            )
@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_feed_version
+from .feed import backfill_feed, fan_out_post, prune_feed
+from .follow_graph import invalidate_following
+from .models import Follow, Group, Post, Recommendation
+from .stats import change_stats
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    """Сбрасывает кеш лент; новый пост раскладывается по лентам."""
+    bump_feed_version()
+    if created:
+        fan_out_post(instance)
+        change_stats(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Сбрасывает кеш лент; пост вычитается из счётчика автора."""
+    bump_feed_version()
+    change_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """Название группы выводится в карточках постов.
+
+    Ключ карточки включает поля группы, поэтому карточки сбрасываются
+    сами, в том числе после удаления группы.
+    """
+    bump_feed_version()
+    if kwargs.get('created') is False:
+        touch_group_posts(instance)
+
+
+@receiver(pre_delete, sender=Group)
+def group_deleting(sender, instance, **kwargs):
+    """Посты группы отмечаются изменёнными, пока связь с ней есть."""
+    touch_group_posts(instance)
+
+
+def touch_group_posts(group):
+    # Новая дата изменения меняет ETag страниц постов.
+    Post.objects.filter(group=group).update(updated=timezone.now())
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    """При подписке лента дополняется постами автора, растут счётчики."""
+    if created:
+        invalidate_following(instance.user_id)
+        Recommendation.objects.filter(
+            user_id=instance.user_id, author_id=instance.author_id).delete()
+        backfill_feed(instance.user_id, instance.author_id)
+        change_stats(instance.author_id, 'followers_count', 1)
+        change_stats(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """При отписке посты автора удаляются из ленты, счётчики уменьшаются."""
+    invalidate_following(instance.user_id)
+    prune_feed(instance.user_id, instance.author_id)
+    change_stats(instance.author_id, 'followers_count', -1)
+    change_stats(instance.user_id, 'following_count', -1)
@@ -0,0 +1,91 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import AuthorStats, Follow, Post, User
+
+STATS_BATCH_SIZE = 1000
+
+
+def count_stats(user_ids):
+    """Счётчики пачки пользователей по постам и подпискам в базе."""
+    user_ids = list(user_ids)
+    # order_by() без полей: иначе ordering модели попадёт в GROUP BY.
+    posts = dict(
+        Post.objects.filter(author_id__in=user_ids).order_by()
+        .values_list('author_id').annotate(count=Count('pk'))
+    )
+    followers = dict(
+        Follow.objects.filter(author_id__in=user_ids)
+        .values_list('author_id').annotate(count=Count('pk'))
+    )
+    following = dict(
+        Follow.objects.filter(user_id__in=user_ids)
+        .values_list('user_id').annotate(count=Count('pk'))
+    )
+    return {
+        user_id: {
+            'posts_count': posts.get(user_id, 0),
+            'followers_count': followers.get(user_id, 0),
+            'following_count': following.get(user_id, 0),
+        }
+        for user_id in user_ids
+    }
+
+
+def recount_stats(user_ids):
+    """Пересчитывает счётчики для пачки пользователей с нуля."""
+    counts = count_stats(user_ids)
+    with transaction.atomic():
+        AuthorStats.objects.filter(user_id__in=counts).delete()
+        AuthorStats.objects.bulk_create(
+            AuthorStats(user_id=user_id, **values)
+            for user_id, values in counts.items()
+        )
+
+
+def recount_all_stats(batch_size=STATS_BATCH_SIZE):
+    """Пересчитывает счётчики всех пользователей пачками."""
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    batch = []
+    total = 0
+    for user_id in user_ids.iterator():
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            recount_stats(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        recount_stats(batch)
+        total += len(batch)
+    return total
+
+
+def change_stats(user_id, field, delta):
+    """Сдвигает счётчик пользователя, заводя запись при первом росте."""
+    updated = AuthorStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta})
+    # Уменьшать отсутствующую запись не нужно: её либо ещё не было,
+    # либо она удаляется вместе с пользователем.
+    if updated or delta < 0:
+        return
+    counts = count_stats([user_id])[user_id]
+    try:
+        with transaction.atomic():
+            AuthorStats.objects.create(user_id=user_id, **counts)
+    except IntegrityError:
+        # Запись успела завести параллельная транзакция, и неизвестно,
+        # учла ли она наш сдвиг: пересчитываем под блокировкой строки.
+        with transaction.atomic():
+            stats = AuthorStats.objects.select_for_update().get(
+                user_id=user_id)
+            for name, value in count_stats([user_id])[user_id].items():
+                setattr(stats, name, value)
+            stats.save()
+
+
+def get_stats(user):
+    """Счётчики пользователя; для новых пользователей — нулевые."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.follow_graph import following_ids
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def followed_authors(context):
+    """Авторы, на которых подписан текущий пользователь."""
+    return following_ids(context['request'].user.pk)
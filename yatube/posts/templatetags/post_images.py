@@ -0,0 +1,16 @@
+from django import template
+
+from posts.images import IMAGE_PRESETS, picture_sources
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(post, preset, css_class=''):
+    width, height = IMAGE_PRESETS[preset]['size']
+    return {
+        'post': post,
+        'sources': picture_sources(post, preset),
+        'geometry': f'{width}x{height}',
+        'css_class': css_class,
+    }
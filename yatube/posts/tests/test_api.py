@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(AMOUNT_OF_POSTS=2)
+class PostApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Тестовый пост {number}',
+                group=cls.group,
+            )
+            for number in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_feeds(self):
+        """Ленты отдают компактные посты от новых к старым."""
+        urls = (
+            reverse('posts:api_main_page'),
+            reverse('posts:api_group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:api_profile', kwargs={'username': 'HasNoName'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.guest_client.get(url).json()
+                self.assertEqual(
+                    [post['id'] for post in data['results']],
+                    [self.posts[2].pk, self.posts[1].pk])
+                post = data['results'][0]
+                self.assertEqual(post['author'], 'HasNoName')
+                self.assertEqual(post['group'], 'test-slug')
+                self.assertIsNone(post['image'])
+                self.assertEqual(post['url'], reverse(
+                    'posts:post_detail',
+                    kwargs={'post_id': self.posts[2].pk}))
+
+    def test_cursor_pagination(self):
+        """Следующая страница запрашивается по курсору next."""
+        url = reverse('posts:api_main_page')
+        data = self.guest_client.get(url).json()
+        self.assertIsNone(data['previous'])
+        data = self.guest_client.get(url, {'after': data['next']}).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], [self.posts[0].pk])
+        self.assertIsNone(data['next'])
+        self.assertIsNotNone(data['previous'])
+
+    def test_fields(self):
+        """Параметр fields оставляет только перечисленные поля."""
+        url = reverse('posts:api_main_page')
+        data = self.guest_client.get(url, {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        response = self.guest_client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail(self):
+        """Пост отдаётся с числом комментариев."""
+        response = self.guest_client.get(reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.posts[0].pk}))
+        self.assertEqual(response.json()['comment_count'], 1)
+        response = self.guest_client.get(reverse(
+            'posts:api_post_detail', kwargs={'post_id': 0}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_modified_without_queries(self):
+        """Повторный запрос с тем же ETag получает 304 без запросов."""
+        url = reverse('posts:api_group_list', kwargs={'slug': 'test-slug'})
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_feed(self):
+        """После нового поста прежний ETag не подходит."""
+        url = reverse('posts:api_main_page')
+        etag = self.guest_client.get(url)['ETag']
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        """Пост без изменений отдаётся как 304, новый комментарий — нет."""
+        url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.posts[0].pk})
+        etag = self.guest_client.get(url)['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Comment.objects.create(
+            post=self.posts[0], author=self.user, text='Ещё один')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
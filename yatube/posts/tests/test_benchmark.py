@@ -0,0 +1,135 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.budgets import Route, url_names
+from posts.benchmark import (compare, measure, percentile, posts_routes,
+                             run_benchmark, sample_objects, site_routes)
+from posts.models import FeedItem, Follow, Group, Post
+from posts.seeding import SEED_PREFIX, Seeder
+
+User = get_user_model()
+
+
+class SeedBenchmarkTests(TestCase):
+    def test_seed(self):
+        """Создаются все сущности, ленты и счётчики согласованы."""
+        call_command(
+            'seed_benchmark', users=30, posts=300, groups=3, comments=50,
+            follows=60, seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(
+            User.objects.filter(username__startswith=SEED_PREFIX).count(),
+            30)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertTrue(Follow.objects.exists())
+        expected_feed = sum(
+            Post.objects.filter(author_id=follow.author_id).count()
+            for follow in Follow.objects.all()
+        )
+        self.assertEqual(FeedItem.objects.count(), expected_feed)
+        author = User.objects.filter(
+            username__startswith=SEED_PREFIX).first()
+        self.assertEqual(author.stats.posts_count, author.posts.count())
+
+    def test_power_law(self):
+        """Самый активный автор пишет заметно больше среднего."""
+        Seeder(users=50, posts=1000, groups=1, comments=0, follows=0,
+               seed=1).run()
+        busiest = max(
+            User.objects.all(), key=lambda user: user.posts.count())
+        self.assertGreater(busiest.posts.count(), 1000 / 50 * 3)
+
+    def test_benchmark_requires_seed(self):
+        """Без данных команда просит сначала заполнить базу."""
+        with self.assertRaisesMessage(CommandError, 'seed_benchmark'):
+            call_command('run_benchmark', requests=1, stdout=StringIO())
+
+
+class RunBenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Seeder(users=10, posts=60, groups=2, comments=10, follows=30,
+               seed=1).run()
+
+    def test_percentile(self):
+        """Перцентиль берётся по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 95), 7)
+
+    def test_routes_match_urlconf(self):
+        """У каждого именованного адреса из URLconf есть замер."""
+        sample = sample_objects()
+        self.assertEqual(
+            {route.name for route in posts_routes(sample)},
+            url_names({'posts'}))
+        self.assertEqual(
+            {route.name for route in site_routes(sample)},
+            url_names({'posts', 'users', 'about'}))
+
+    def test_all_posts_routes(self):
+        """Замеряются все адреса posts.urls, изменения откатываются."""
+        comments = Post.objects.get(pk=sample_objects()['post'].pk)
+        comments = comments.comments.count()
+        routes = posts_routes(sample_objects())
+        report = run_benchmark(routes, requests=2, warmup=0)
+        self.assertEqual(
+            set(report['views']), {route.name for route in routes})
+        for name, result in report['views'].items():
+            with self.subTest(name=name):
+                self.assertLess(result['status'], 400)
+                self.assertGreaterEqual(result['p95_ms'], result['p50_ms'])
+        self.assertEqual(
+            sample_objects()['post'].comments.count(), comments)
+
+    def test_command_writes_report(self):
+        """Команда пишет отчёт в JSON и сравнивает с прошлым."""
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command('run_benchmark', requests=1, warmup=0, output=path,
+                     stdout=StringIO())
+        with open(path, encoding='utf-8') as file:
+            report = json.load(file)
+        self.assertIn('posts:main_page', report['views'])
+        self.assertTrue(all(
+            '(p50' in line for line in compare(report, report)))
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class MeasureTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        Post.objects.create(author=self.author, text='Тестовый пост')
+
+    def test_reads_as_in_production(self):
+        """Читающий адрес замеряется вне транзакции и читает с реплики."""
+        log = []
+        wrapper = (lambda execute, sql, *args:
+                   log.append(sql) or execute(sql, *args))
+        with connections['replica'].execute_wrapper(wrapper):
+            result = measure(Route('posts:main_page'), 1, warmup=0)
+        self.assertTrue(log)
+        self.assertGreater(result['queries'], 0)
+
+    def test_writes_rolled_back(self):
+        """Меняющий данные адрес выполняется в откатываемой транзакции."""
+        measure(Route(
+            'posts:profile_follow', {'username': self.author.username},
+            self.reader), 1, warmup=0)
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,77 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cards import card_key, render_cards
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            group=self.group,
+        )
+        cache.clear()
+
+    def test_card_served_from_cache(self):
+        """Готовая карточка берётся из кеша, а не рендерится заново."""
+        cache.set(card_key(self.post), '<article>Из кеша</article>')
+        response = self.guest_client.get(
+            reverse('posts:group_list', args=(self.group.slug,)))
+        self.assertContains(response, '<article>Из кеша</article>')
+
+    def test_cards_cached_in_bulk(self):
+        """Недостающие карточки сохраняются в кеш."""
+        cards = render_cards([self.post])
+        self.assertEqual(cards[0][0], self.post)
+        self.assertEqual(cache.get(card_key(self.post)), cards[0][1])
+
+    def test_card_invalidated_on_edit(self):
+        """После редактирования поста карточка рендерится заново."""
+        render_cards([self.post])
+        self.post.text = 'Изменённый текст'
+        self.post.save()
+        self.assertIn('Изменённый текст', render_cards([self.post])[0][1])
+
+    def test_card_invalidated_on_group_edit(self):
+        """После переименования группы карточки её постов обновляются."""
+        render_cards([self.post])
+        # Своя копия: объект класса общий для всех тестов.
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertIn('Новое название', render_cards([post])[0][1])
+
+    def test_card_invalidated_on_group_delete(self):
+        """После удаления группы карточки её постов без неё."""
+        group = Group.objects.create(title='Удаляемая группа', slug='gone')
+        Post.objects.filter(pk=self.post.pk).update(group=group)
+        render_cards(Post.objects.for_feed())
+        group.delete()
+        card = render_cards(Post.objects.for_feed())[0][1]
+        self.assertNotIn('Удаляемая группа', card)
+
+    def test_card_invalidated_on_author_edit(self):
+        """После смены имени автора карточки его постов обновляются."""
+        render_cards(Post.objects.for_feed())
+        User.objects.filter(pk=self.user.pk).update(
+            first_name='Новое', last_name='Имя')
+        card = render_cards(Post.objects.for_feed())[0][1]
+        self.assertIn('Новое Имя', card)
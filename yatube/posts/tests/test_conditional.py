@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    FAR_FUTURE = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user.username}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_not_modified(self):
+        """Без изменений страница отдаётся как 304 за один запрос."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(1):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_no_last_modified(self):
+        """Last-Modified не отдаётся, If-Modified-Since не даёт 304."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertFalse(response.has_header('Last-Modified'))
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=self.FAR_FUTURE)
+                self.assertEqual(response.status_code, 200)
+
+    def test_deletion_invalidates(self):
+        """Удаление комментария и поста меняет ETag страниц."""
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        extra = Post.objects.create(
+            author=self.user, text='Лишний пост', group=self.group)
+        etags = {url: self.reader_client.get(url)['ETag'] for url in self.urls}
+        comment.delete()
+        extra.delete()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_changes_invalidate(self):
+        """Комментарий, правка поста и подписка меняют ETag."""
+        changes = (
+            lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'),
+            lambda: Post.objects.get(pk=self.post.pk).save(),
+            lambda: Follow.objects.create(
+                user=self.reader, author=self.user),
+        )
+        for url, change in zip(self.urls, changes):
+            with self.subTest(url=url):
+                etag = self.reader_client.get(url)['ETag']
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_varies_on_user(self):
+        """У гостя и пользователя разные ETag, ответ зависит от Cookie."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertIn('Cookie', response['Vary'])
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 200)
+
+    def test_missing_object(self):
+        """Для несуществующего объекта по-прежнему 404."""
+        urls = (
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 404)
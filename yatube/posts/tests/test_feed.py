@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.feed import backfill_feed
+from posts.models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+class FeedItemTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.author = User.objects.create(username='Author')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+        cls.URL_FOLLOW_INDEX = reverse('posts:follow_index')
+        cls.URL_PROFILE_FOLLOW = reverse(
+            'posts:profile_follow',
+            kwargs={'username': FeedItemTests.author.username})
+        cls.URL_PROFILE_UNFOLLOW = reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': FeedItemTests.author.username})
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_backfills_feed(self):
+        """При подписке в ленту попадают уже опубликованные посты."""
+        self.authorized_client.get(self.URL_PROFILE_FOLLOW)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.user, post=self.old_post).exists())
+
+    def test_new_post_fans_out(self):
+        """Новый пост раскладывается по лентам подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        item = FeedItem.objects.get(user=self.user, post=new_post)
+        self.assertEqual(item.pub_date, new_post.pub_date)
+        self.assertEqual(item.author, self.author)
+
+    def test_unfollow_prunes_feed(self):
+        """После отписки посты автора пропадают из ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.authorized_client.get(self.URL_PROFILE_UNFOLLOW)
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+        response = self.authorized_client.get(self.URL_FOLLOW_INDEX)
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_post_delete_prunes_feed(self):
+        """Удалённый пост пропадает из ленты подписок."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Удаляемый пост')
+        post.delete()
+        response = self.authorized_client.get(self.URL_FOLLOW_INDEX)
+        self.assertNotIn(post, response.context['page_obj'].object_list)
+        self.assertFalse(FeedItem.objects.filter(post_id=post.pk).exists())
+
+    def test_follow_index_ordered_by_pub_date(self):
+        """Лента подписок упорядочена от новых постов к старым."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый пост')
+        response = self.authorized_client.get(self.URL_FOLLOW_INDEX)
+        self.assertEqual(
+            list(response.context['page_obj'].object_list),
+            [new_post, self.old_post])
+
+    def test_follow_index_cursor_pages(self):
+        """Курсор ленты подписок проходит посты с одной датой без пропусков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост № {number}')
+            for number in range(settings.AMOUNT_OF_POSTS + 3)
+        )
+        Post.objects.update(pub_date=self.old_post.pub_date)
+        FeedItem.objects.all().delete()
+        backfill_feed(self.user.pk, self.author.pk)
+        seen = []
+        response = self.authorized_client.get(self.URL_FOLLOW_INDEX)
+        while True:
+            page_obj = response.context['page_obj']
+            seen.extend(page_obj.object_list)
+            if not page_obj.paginator.next_cursor:
+                break
+            response = self.authorized_client.get(
+                self.URL_FOLLOW_INDEX,
+                {'after': page_obj.paginator.next_cursor})
+        self.assertEqual(len(seen), settings.AMOUNT_OF_POSTS + 4)
+        self.assertEqual(len(set(seen)), len(seen))
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.follow_graph import following_ids, following_many, is_following
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.other = User.objects.create(username='Other')
+        cls.authors = [
+            User.objects.create(username=f'Author_{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_lookups(self):
+        """Подписки читаются из базы один раз, дальше — из кеша."""
+        with self.assertNumQueries(1):
+            self.assertTrue(is_following(self.user.pk, self.authors[0].pk))
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                is_following(self.user.pk, self.authors[2].pk))
+            self.assertEqual(
+                list(following_ids(self.user.pk)),
+                sorted(author.pk for author in self.authors[:2]))
+        self.assertEqual(len(following_ids(None)), 0)
+
+    def test_batch(self):
+        """Подписки нескольких пользователей догружаются одним запросом."""
+        with self.assertNumQueries(1):
+            following = following_many([self.user.pk, self.other.pk])
+        self.assertEqual(len(following[self.user.pk]), 2)
+        self.assertEqual(len(following[self.other.pk]), 0)
+        with self.assertNumQueries(0):
+            following_many([self.user.pk, self.other.pk])
+
+    def test_invalidated_on_follow(self):
+        """Подписка и отписка через страницы сбрасывают кеш."""
+        author = self.authors[2]
+        self.assertFalse(is_following(self.user.pk, author.pk))
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+        self.assertTrue(is_following(self.user.pk, author.pk))
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': author.username}))
+        self.assertTrue(response.context['following'])
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}))
+        self.assertFalse(is_following(self.user.pk, author.pk))
+
+    def test_group_cards_marked(self):
+        """В ленте сообщества отмечены авторы, на которых подписан."""
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for author in self.authors[1:]:
+            Post.objects.create(author=author, text='Текст', group=group)
+        url = reverse('posts:group_list', kwargs={'slug': group.slug})
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Вы подписаны на автора', count=1)
+        Follow.objects.create(user=self.user, author=self.authors[2])
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertContains(response, 'Вы подписаны на автора', count=2)
@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import CursorPaginator, encode_cursor
+from posts.views import FOLLOW_FEED_CURSOR
+
+User = get_user_model()
+
+
+class FeedIndexesTests(TestCase):
+    """Запросы лент идут по индексам и не сортируют строки отдельно."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.reader = User.objects.create(username='Reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_feeds(self):
+        """Ленты и их следующие страницы идут по составным индексам."""
+        after = timezone.now()
+        feeds = {
+            'post_pub_date_idx': Post.objects.for_feed(),
+            'post_author_pub_date_idx': Post.objects.for_feed().filter(
+                author=self.user),
+            'post_group_pub_date_idx': Post.objects.for_feed().filter(
+                group=self.group),
+        }
+        for index, queryset in feeds.items():
+            with self.subTest(index=index):
+                self.assertUsesIndex(
+                    queryset.order_by('-pub_date', '-pk')[:11], index)
+                self.assertUsesIndex(
+                    queryset.filter(pub_date__lt=after).order_by(
+                        '-pub_date', '-pk')[:11],
+                    index)
+                # Постраничный пагинатор сортирует по Meta.ordering.
+                self.assertUsesIndex(queryset[10:21], index)
+
+    def test_follow_feed(self):
+        """Лента подписок и её страницы идут по индексу ленты."""
+        queryset = Post.objects.for_follow_feed(self.reader)
+        after = {'feed_pub_date__lt': timezone.now()}
+        pages = {
+            'first': queryset[:11],
+            'after': queryset.filter(**after)[:11],
+            'before': queryset.filter(
+                feed_pub_date__gt=timezone.now()).order_by(
+                    'feed_pub_date', 'feed_item_id')[:11],
+            # Постраничный пагинатор сортирует так же, но со сдвигом.
+            'window': queryset[10:21],
+        }
+        for name, page in pages.items():
+            with self.subTest(page=name):
+                self.assertUsesIndex(page, 'feed_user_pub_date_idx')
+
+    def test_follow_feed_paginator(self):
+        """Курсор пагинатора ленты подписок не сортирует её записи."""
+        paginator = CursorPaginator(
+            Post.objects.for_follow_feed(self.reader), 10,
+            keys=FOLLOW_FEED_CURSOR)
+        page = paginator.page()
+        self.assertEqual(list(page), [self.post])
+        with CaptureQueriesContext(connection) as queries:
+            CursorPaginator(
+                Post.objects.for_follow_feed(self.reader), 10,
+                after=encode_cursor(page[0], FOLLOW_FEED_CURSOR),
+                keys=FOLLOW_FEED_CURSOR).page()
+        sql = queries.captured_queries[0]['sql']
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = '\n'.join(str(row) for row in cursor.fetchall())
+        self.assertIn('feed_user_pub_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_comments(self):
+        """Последний комментарий поста берётся из индекса."""
+        self.assertUsesIndex(
+            Comment.objects.filter(post=self.post).order_by('-created')[:1],
+            'comment_post_created_idx')
+
+    def test_follow(self):
+        """Проверка подписки читает только индекс."""
+        self.assertUsesIndex(
+            Follow.objects.filter(
+                user=self.reader).values_list('author_id', flat=True),
+            'COVERING INDEX follow_user_author_idx')
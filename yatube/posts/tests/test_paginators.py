@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts.models import Post
+from posts.paginators import WindowPaginator, refresh_count
+
+User = get_user_model()
+
+
+class InlineThread:
+    """Поток, который выполняется сразу в start()."""
+
+    def __init__(self, target, args=(), daemon=None):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        self.target(*self.args)
+
+
+class WindowPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Тестовый пост № {i}')
+            for i in range(95)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(PAGINATOR_COUNT_IN_BACKGROUND=False)
+    def test_page_window_is_bounded(self):
+        """Пагинатор отдаёт только окно номеров вокруг текущей страницы."""
+        paginator = WindowPaginator(Post.objects.all(), 10, window=2)
+        page = paginator.get_page(5)
+        self.assertEqual(list(paginator.page_window), [3, 4, 5, 6, 7])
+        self.assertEqual(paginator.num_pages, 10)
+        self.assertEqual(len(page), 10)
+
+    @override_settings(PAGINATOR_COUNT_IN_BACKGROUND=False)
+    def test_count_is_cached(self):
+        """Число записей берётся из кеша без повторного COUNT(*)."""
+        WindowPaginator(Post.objects.all(), 10).get_page(1)
+        paginator = WindowPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(paginator.get_page(2)), 10)
+        self.assertEqual(paginator.count, 95)
+
+    @override_settings(PAGINATOR_COUNT_IN_BACKGROUND=True)
+    @mock.patch.object(WindowPaginator, 'schedule_count_refresh')
+    def test_has_next_without_count(self, schedule_count_refresh):
+        """Без числа в кеше следующая страница ищется по N+1 строке."""
+        paginator = WindowPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(1):
+            page = paginator.get_page(9)
+        self.assertIsNone(paginator.count)
+        self.assertTrue(page.has_next())
+        self.assertEqual(len(page), 10)
+        schedule_count_refresh.assert_called_once_with()
+
+        paginator = WindowPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(10)
+        self.assertFalse(page.has_next())
+        self.assertEqual(len(page), 5)
+
+    @override_settings(PAGINATOR_COUNT_IN_BACKGROUND=True)
+    @mock.patch.object(WindowPaginator, 'schedule_count_refresh')
+    def test_empty_page_without_count(self, schedule_count_refresh):
+        """Страница за концом ленты без числа записей открывает первую."""
+        page = WindowPaginator(Post.objects.all(), 10).get_page(50)
+        self.assertEqual(page.number, 1)
+
+    @override_settings(PAGINATOR_COUNT_IN_BACKGROUND=True)
+    @mock.patch('posts.paginators._refresh_count_in_background',
+                refresh_count)
+    @mock.patch('posts.paginators.threading.Thread', InlineThread)
+    def test_count_refreshed_with_default_cache(self):
+        """Фоновый подсчёт работает с настроенным кешем по умолчанию."""
+        paginator = WindowPaginator(Post.objects.all(), 10)
+        paginator.get_page(1)
+        self.assertIsNone(paginator.count)
+        paginator = WindowPaginator(Post.objects.all(), 10)
+        paginator.get_page(9)
+        self.assertEqual(paginator.count, 95)
+        self.assertEqual(list(paginator.page_window), [7, 8, 9, 10])
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueriesTests(TestCase):
+    """Число запросов страницы не зависит от числа постов на ней."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(3):
+            author = User.objects.create(username=f'Author_{i}')
+            Follow.objects.create(user=cls.user, author=author)
+            for j in range(4):
+                post = Post.objects.create(
+                    author=author,
+                    text=f'Тестовый пост {i}-{j}',
+                    group=cls.group,
+                )
+        for i in range(5):
+            commentator = User.objects.create(username=f'Commentator_{i}')
+            Comment.objects.create(
+                author=commentator,
+                post=post,
+                text='Тестовый комментарий',
+            )
+        cls.post = post
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_guest_pages_num_queries(self):
+        """Ленты и страница поста выполняют фиксированное число запросов."""
+        pages = {
+            reverse('posts:main_page'): 1,
+            reverse('posts:group_list', args=(self.group.slug,)): 2,
+            reverse('posts:profile', args=(self.post.author.username,)): 2,
+            reverse('posts:post_detail', args=(self.post.pk,)): 3,
+        }
+        for url, num_queries in pages.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(num_queries):
+                    self.guest_client.get(url)
+
+    def test_follow_index_num_queries(self):
+        """Лента подписок выполняет фиксированное число запросов."""
+        with self.assertNumQueries(4):
+            self.authorized_client.get(reverse('posts:follow_index'))
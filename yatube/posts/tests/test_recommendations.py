@@ -0,0 +1,110 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Post, Recommendation
+from posts.recommendations import FollowGraph, refresh_recommendations
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.friends = [
+            User.objects.create(username=f'Friend_{number}')
+            for number in range(2)
+        ]
+        cls.popular = User.objects.create(username='Popular')
+        cls.active = User.objects.create(username='Active')
+        cls.silent = User.objects.create(username='Silent')
+        for friend in cls.friends:
+            Follow.objects.create(user=cls.user, author=friend)
+            Follow.objects.create(user=friend, author=cls.popular)
+            # Обратная подписка и подписка на уже читаемого автора
+            # не должны попасть в рекомендации.
+            Follow.objects.create(user=friend, author=cls.user)
+        Follow.objects.create(user=cls.friends[0], author=cls.friends[1])
+        Follow.objects.create(user=cls.friends[1], author=cls.active)
+        Follow.objects.create(user=cls.friends[1], author=cls.silent)
+        Post.objects.create(author=cls.popular, text='Пост')
+        for number in range(5):
+            Post.objects.create(author=cls.active, text=f'Пост {number}')
+        old = Post.objects.create(author=cls.silent, text='Старый пост')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=365))
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def recommended(self, user):
+        return list(Recommendation.objects.filter(
+            user=user).values_list('author__username', flat=True))
+
+    def test_two_hop_weighted(self):
+        """Кандидаты в двух шагах упорядочены по путям и активности."""
+        refresh_recommendations()
+        # Два пути к Popular с одним постом весят меньше одного пути
+        # к Active с пятью: 2 * log(2) < log(6).
+        self.assertEqual(self.recommended(self.user), ['Active', 'Popular'])
+
+    def test_top_limit(self):
+        """Для пользователя хранится не больше top рекомендаций."""
+        refresh_recommendations(top=1)
+        self.assertEqual(self.recommended(self.user), ['Active'])
+
+    def test_inactive_authors_skipped(self):
+        """Авторы без постов за последние дни не рекомендуются."""
+        refresh_recommendations()
+        self.assertNotIn('Silent', self.recommended(self.user))
+        refresh_recommendations(activity_days=400)
+        self.assertIn('Silent', self.recommended(self.user))
+
+    def test_command_replaces_table(self):
+        """Команда заменяет прежние рекомендации новыми."""
+        Recommendation.objects.create(
+            user=self.popular, author=self.active, score=100)
+        out = StringIO()
+        call_command('recommend_follows', stdout=out)
+        self.assertIn('Сохранено', out.getvalue())
+        self.assertFalse(Recommendation.objects.filter(
+            user=self.popular).exists())
+        self.assertEqual(self.recommended(self.user), ['Active', 'Popular'])
+
+    def test_computed_before_replacing(self):
+        """Расчёт идёт до удаления старых строк, а не в транзакции записи."""
+        Recommendation.objects.create(
+            user=self.popular, author=self.active, score=100)
+        recommend = FollowGraph.recommend
+
+        def check_old_rows_kept(graph, *args):
+            self.assertTrue(Recommendation.objects.filter(
+                user=self.popular).exists())
+            return recommend(graph, *args)
+
+        with mock.patch.object(
+                FollowGraph, 'recommend', check_old_rows_kept):
+            refresh_recommendations()
+        self.assertEqual(self.recommended(self.user), ['Active', 'Popular'])
+
+    def test_follow_page_block(self):
+        """Лента подписок показывает рекомендации, подписка их убирает."""
+        refresh_recommendations()
+        url = reverse('posts:follow_index')
+        response = self.authorized_client.get(url)
+        self.assertContains(response, 'Кого почитать')
+        self.assertEqual(
+            [item.author for item in response.context['recommendations']],
+            [self.active, self.popular])
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'Active'}))
+        self.assertEqual(self.recommended(self.user), ['Popular'])
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.search import filter_by_match, match_expression, search_posts
+
+User = get_user_model()
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.other = User.objects.create(username='Other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.cat_post = Post.objects.create(
+            author=cls.user,
+            text='Кошка спит на диване, кошка <b>довольна</b>',
+            group=cls.group,
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.other,
+            text='Собака гуляет, а кошка смотрит в окно',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_match_expression_escapes_operators(self):
+        """Операторы FTS5 из ввода не попадают в запрос."""
+        self.assertEqual(
+            match_expression('кошка OR "диван'), '"кошка"* "OR"* "диван"*')
+        self.assertIsNone(match_expression(' -*" '))
+
+    def test_results_ranked(self):
+        """Сначала идут посты, где слово встречается чаще."""
+        posts, next_cursor = search_posts('кошка', 10)
+        self.assertEqual(posts, [self.cat_post, self.dog_post])
+        self.assertIsNone(next_cursor)
+
+    def test_prefix_search(self):
+        """Слово ищется по началу."""
+        posts, _ = search_posts('соба', 10)
+        self.assertEqual(posts, [self.dog_post])
+
+    def test_filters(self):
+        """Результаты фильтруются по группе и автору."""
+        posts, _ = search_posts('кошка', 10, group=self.group.slug)
+        self.assertEqual(posts, [self.cat_post])
+        posts, _ = search_posts('кошка', 10, author=self.other.username)
+        self.assertEqual(posts, [self.dog_post])
+
+    def test_keyset_pagination(self):
+        """Следующая страница продолжает выдачу после курсора."""
+        first, next_cursor = search_posts('кошка', 1)
+        self.assertEqual(first, [self.cat_post])
+        second, next_cursor = search_posts('кошка', 1, after=next_cursor)
+        self.assertEqual(second, [self.dog_post])
+        self.assertIsNone(next_cursor)
+
+    def test_index_follows_edits(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.create(author=self.user, text='Попугай')
+        post.text = 'Хомяк'
+        post.save()
+        self.assertEqual(search_posts('попугай', 10)[0], [])
+        self.assertEqual(search_posts('хомяк', 10)[0], [post])
+        post.delete()
+        self.assertEqual(search_posts('хомяк', 10)[0], [])
+
+    def test_snippet_highlighted_and_escaped(self):
+        """Найденное слово выделено, разметка из текста экранирована."""
+        posts, _ = search_posts('довольна', 10)
+        self.assertIn('<mark>довольна</mark>', posts[0].snippet)
+        self.assertIn('&lt;b&gt;', posts[0].snippet)
+
+    @override_settings(AMOUNT_OF_POSTS=1)
+    def test_search_page(self):
+        """Страница поиска выводит результаты и ссылку на следующие."""
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': 'кошка'})
+        self.assertEqual(response.context['posts'], [self.cat_post])
+        self.assertIn('after=', response.context['next_query'])
+        self.assertTemplateUsed(response, 'posts/search.html')
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по полнотекстовому индексу."""
+        queryset = filter_by_match(Post.objects.all(), 'собака')
+        self.assertEqual(list(queryset), [self.dog_post])
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.guest_client.force_login(admin)
+        response = self.guest_client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'диван'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.cat_post])
@@ -0,0 +1,101 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import stats
+from posts.models import AuthorStats, Follow, Post
+
+User = get_user_model()
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+        cls.author = User.objects.create(username='Author')
+
+    def test_post_changes_posts_count(self):
+        """Создание и удаление поста меняет счётчик автора."""
+        post = Post.objects.create(author=self.author, text='Тестовый пост')
+        Post.objects.create(author=self.author, text='Второй пост')
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 2)
+        post.delete()
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 1)
+
+    def test_follow_changes_counters(self):
+        """Подписка и отписка меняют счётчики обоих пользователей."""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).followers_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).following_count, 1)
+        follow.delete()
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).followers_count, 0)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).following_count, 0)
+
+    def test_first_change_races_with_other_transaction(self):
+        """Если запись счётчиков завели параллельно, сдвиг не теряется."""
+        Post.objects.bulk_create([
+            Post(author=self.author, text='Тестовый пост'),
+            Post(author=self.author, text='Второй пост'),
+        ])
+        count = stats.count_stats
+
+        def count_while_other_creates(user_ids):
+            counts = count(user_ids)
+            # Параллельная транзакция завела запись, не увидев второй пост.
+            AuthorStats.objects.get_or_create(
+                user=self.author, defaults={'posts_count': 1})
+            return counts
+
+        with mock.patch.object(
+                stats, 'count_stats', count_while_other_creates):
+            stats.change_stats(self.author.pk, 'posts_count', 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 2)
+
+    def test_recount_stats_command(self):
+        """Команда recount_stats восстанавливает счётчики."""
+        Post.objects.create(author=self.author, text='Тестовый пост')
+        Post.objects.create(author=self.author, text='Второй пост')
+        Follow.objects.create(user=self.user, author=self.author)
+        AuthorStats.objects.all().delete()
+        call_command('recount_stats', batch_size=1, stdout=StringIO())
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).following_count, 1)
+
+    def test_profile_uses_stats(self):
+        """Профиль показывает счётчики без подсчёта постов."""
+        Post.objects.create(author=self.author, text='Тестовый пост')
+        response = Client().get(
+            reverse('posts:profile', args=(self.author.username,)))
+        self.assertEqual(response.context['count'], 1)
+        self.assertEqual(response.context['stats'].posts_count, 1)
+
+    def test_profile_without_stats(self):
+        """Профиль нового пользователя показывает нулевые счётчики."""
+        response = Client().get(
+            reverse('posts:profile', args=(self.user.username,)))
+        self.assertEqual(response.context['count'], 0)
+
+    def test_delete_author_with_posts(self):
+        """Удаление автора вместе с постами не ломает счётчики."""
+        author = User.objects.create(username='Temporary')
+        Post.objects.create(author=author, text='Тестовый пост')
+        Follow.objects.create(user=self.user, author=author)
+        author.delete()
+        self.assertFalse(AuthorStats.objects.filter(user=author.pk).exists())
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.user).following_count, 0)
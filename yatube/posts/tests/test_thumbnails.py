@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.images import IMAGE_FORMATS, IMAGE_PRESETS, build_variants
+from posts.models import Post, PostImageVariant
+from posts.thumbnails import THUMBNAIL_SIZES, generate_thumbnails
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class InlineExecutor:
+    """Заменяет пул процессов: тестовая база видна только в процессе."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, func, iterable, chunksize=1):
+        return map(func, iterable)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='HasNoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post_with_image(self):
+        image = BytesIO()
+        Image.new('RGB', (1200, 800), color=(200, 30, 30)).save(image, 'PNG')
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с большой картинкой',
+            image=SimpleUploadedFile('big.png', image.getvalue(),
+                                     'image/png'),
+        )
+
+    def thumbnails_count(self):
+        count = 0
+        for _, _, files in os.walk(os.path.join(TEMP_MEDIA_ROOT, 'cache')):
+            count += len(files)
+        return count
+
+    def test_generate_thumbnails(self):
+        """Создаются миниатюры всех размеров из шаблонов."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        before = self.thumbnails_count()
+        generate_thumbnails(post.image.name)
+        self.assertEqual(self.thumbnails_count() - before,
+                         len(THUMBNAIL_SIZES))
+
+    @mock.patch('posts.views.schedule_thumbnails')
+    def test_post_create_schedules_thumbnails(self, schedule_thumbnails):
+        """После создания поста с картинкой миниатюры ставятся в очередь."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Тестовый пост',
+                'image': SimpleUploadedFile(
+                    'upload.gif', SMALL_GIF, 'image/gif'),
+            },
+        )
+        post = Post.objects.get(text='Тестовый пост')
+        schedule_thumbnails.assert_called_once_with(post)
+
+    @mock.patch('posts.views.schedule_thumbnails')
+    def test_post_edit_without_image(self, schedule_thumbnails):
+        """Правка текста без новой картинки не создаёт миниатюр."""
+        post = Post.objects.create(author=self.user, text='Тестовый пост')
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            data={'text': 'Новый текст'},
+        )
+        schedule_thumbnails.assert_not_called()
+
+    @mock.patch(
+        'posts.management.commands.pregenerate_thumbnails.'
+        'ProcessPoolExecutor', InlineExecutor)
+    def test_pregenerate_command(self):
+        """Команда создаёт миниатюры для уже загруженных картинок."""
+        Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile('backlog.gif', SMALL_GIF, 'image/gif'),
+        )
+        out = StringIO()
+        call_command('pregenerate_thumbnails', stdout=out)
+        self.assertIn('Миниатюры созданы для 1 картинок', out.getvalue())
+
+    def test_build_variants(self):
+        """Для каждого пресета создаются ширины в WebP и JPEG."""
+        post = self.create_post_with_image()
+        variants = build_variants(post)
+        expected = sum(
+            len(preset['widths']) for preset in IMAGE_PRESETS.values()
+        ) * len(IMAGE_FORMATS)
+        self.assertEqual(len(variants), expected)
+        self.assertEqual(
+            PostImageVariant.objects.filter(post=post).count(), expected)
+        variant = PostImageVariant.objects.get(
+            post=post, preset='feed', format='webp', width=320)
+        self.assertEqual(variant.height, 113)
+        with Image.open(variant.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            self.assertEqual(image.size, (320, 113))
+
+    def test_build_variants_refreshes_cached_feed(self):
+        """Закешированная лента после вариантов картинки выводит srcset."""
+        post = self.create_post_with_image()
+        url = reverse('posts:main_page')
+        self.assertNotContains(
+            self.authorized_client.get(url), 'type="image/webp"')
+        # TestCase не коммитит транзакцию: on_commit выполняется сразу.
+        with mock.patch('django.db.transaction.on_commit',
+                        lambda func, using=None: func()):
+            build_variants(post)
+        self.assertContains(
+            self.authorized_client.get(url), 'type="image/webp"')
+
+    def test_detail_renders_srcset(self):
+        """Страница поста выводит srcset с ленивой загрузкой и размерами."""
+        post = self.create_post_with_image()
+        build_variants(post)
+        variant = PostImageVariant.objects.get(
+            post=post, preset='detail', format='webp', width=300)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, f'{variant.image.url} 300w')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="600" height="600"')
@@ -0,0 +1,95 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Comment, FeedItem, Follow, Group, Post
+
+User = get_user_model()
+
+PUB_DATE = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+class PostTransferTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=PUB_DATE)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl.gz')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def export(self):
+        call_command('export_posts', self.path, stderr=StringIO())
+
+    def load(self):
+        err = StringIO()
+        call_command('import_posts', self.path, batch_size=1, stderr=err)
+        return err.getvalue()
+
+    def test_round_trip(self):
+        """Выгрузка загружается в пустую базу без потерь."""
+        self.export()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        report = self.load()
+        self.assertIn('строк/с', report)
+        post = Post.objects.select_related('author', 'group').get()
+        self.assertEqual(post.text, 'Тестовый пост')
+        self.assertEqual(post.pub_date, PUB_DATE)
+        self.assertEqual(post.author.get_full_name(), 'Лев Толстой')
+        self.assertEqual(post.group.slug, self.group.slug)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.post, post)
+        self.assertEqual(comment.author.username, 'reader')
+        follow = Follow.objects.get()
+        self.assertEqual(
+            FeedItem.objects.get(user=follow.user).post, post)
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertEqual(post.author.stats.followers_count, 1)
+
+    def test_ids_remapped(self):
+        """В непустой базе посты получают новые id, связи сохраняются."""
+        self.export()
+        self.load()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        new_post = Post.objects.exclude(pk=self.post.pk).get()
+        self.assertEqual(new_post.comments.get().text, 'Комментарий')
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.author.stats.posts_count, 2)
+
+    def test_batches_larger_than_insert_limit(self):
+        """Пачки больше лимита SQLite на один INSERT загружаются."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {number}')
+            for number in range(600)
+        )
+        self.export()
+        call_command('import_posts', self.path, stderr=StringIO())
+        self.assertEqual(Post.objects.count(), 1202)
@@ -1,7 +1,7 @@
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
 
@@ -192,9 +192,10 @@ class PostViewsTests(TestCase):
             author=self.user,
         )
         response = self.authorized_client.get(self.URL_MAIN_PAGE)
-        Post.objects.filter(pk=test_post.pk).delete()
-        response_after_delete = self.authorized_client.get(self.URL_MAIN_PAGE)
-        self.assertEqual(response.content, response_after_delete.content)
+        # update() не отправляет сигналов, и страница остаётся в кеше.
+        Post.objects.filter(pk=test_post.pk).update(text='Изменённый текст')
+        response_after_update = self.authorized_client.get(self.URL_MAIN_PAGE)
+        self.assertEqual(response.content, response_after_update.content)
 
         cache.clear()
 
@@ -206,7 +207,30 @@ class PostViewsTests(TestCase):
             response_after_cache_clear.content
         )
 
+    def test_main_page_cache_invalidated(self):
+        """Кеш main_page сбрасывается при изменении постов и групп."""
+        test_post = Post.objects.create(
+            text='Тестовый пост для тестирования кэша.',
+            author=self.user,
+        )
+        response = self.authorized_client.get(self.URL_MAIN_PAGE)
+        self.assertContains(response, test_post.text)
+        Post.objects.filter(pk=test_post.pk).delete()
+        response_after_delete = self.authorized_client.get(self.URL_MAIN_PAGE)
+        self.assertNotContains(response_after_delete, test_post.text)
 
+        self.group.title = 'Новое название группы'
+        self.group.save()
+        response_after_group_edit = self.authorized_client.get(
+            self.URL_MAIN_PAGE)
+        self.assertNotEqual(
+            response_after_delete.content,
+            response_after_group_edit.content
+        )
+        self.assertContains(response_after_group_edit, self.group.title)
+
+
+@override_settings(PAGINATOR_COUNT_IN_BACKGROUND=False)
 class PaginatorViewsTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -296,6 +320,37 @@ class PaginatorViewsTests(TestCase):
             self.left_posts,
             self.error_2nd_page)
 
+    def test_cursor_pages(self):
+        """Курсорная пагинация листает ленту вперёд и назад."""
+        response = self.authorized_client.get(self.URL_MAIN_PAGE)
+        first_page = list(response.context['page_obj'])
+        next_cursor = response.context['page_obj'].paginator.next_cursor
+        self.assertEqual(len(first_page), self.on_page)
+
+        response = self.authorized_client.get(
+            self.URL_MAIN_PAGE, {'after': next_cursor})
+        second_page = list(response.context['page_obj'])
+        self.assertEqual(len(second_page), self.left_posts,
+                         self.error_2nd_page)
+        self.assertEqual(
+            first_page + second_page,
+            list(Post.objects.order_by('-pub_date', '-pk')))
+        self.assertFalse(response.context['page_obj'].has_next())
+
+        previous_cursor = (
+            response.context['page_obj'].paginator.previous_cursor)
+        response = self.authorized_client.get(
+            self.URL_MAIN_PAGE, {'before': previous_cursor})
+        self.assertEqual(list(response.context['page_obj']), first_page)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_invalid_cursor_shows_first_page(self):
+        """Некорректный курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            self.URL_GROUP_LIST, {'after': 'не-курсор'})
+        self.assertEqual(len(response.context['page_obj']), self.on_page)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
 
 class FollowTests(TestCase):
     @classmethod
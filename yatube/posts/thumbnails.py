@@ -0,0 +1,89 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from core import metrics
+
+from .images import IMAGE_PRESETS, build_variants
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Запасные миниатюры шаблона posts/includes/picture.html
+THUMBNAIL_SIZES = tuple(
+    (f'{width}x{height}', {'crop': 'center', 'upscale': True})
+    for width, height in (
+        preset['size'] for preset in IMAGE_PRESETS.values())
+)
+
+_executor = None
+
+
+def generate_thumbnails(name):
+    """Создаёт все миниатюры картинки, которые понадобятся шаблонам."""
+    for geometry, options in THUMBNAIL_SIZES:
+        get_thumbnail(name, geometry, **options)
+    return name
+
+
+def process_post_image(post_id):
+    """Готовит миниатюры и варианты для srcset картинки поста."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return post_id
+    started = time.perf_counter()
+    generate_thumbnails(post.image.name)
+    middle = time.perf_counter()
+    build_variants(post)
+    finished = time.perf_counter()
+    metrics.observe(
+        'yatube_thumbnail_seconds', middle - started, stage='thumbnails')
+    metrics.observe(
+        'yatube_thumbnail_seconds', finished - middle, stage='variants')
+    return post_id
+
+
+def _init_worker():
+    # Соединения с базой нельзя делить между процессами.
+    connections.close_all()
+
+
+def _process_safely(post_id):
+    try:
+        process_post_image(post_id)
+    except Exception:
+        logger.exception('Не удалось обработать картинку поста %s', post_id)
+
+
+def _process_in_background(post_id):
+    try:
+        _process_safely(post_id)
+    finally:
+        connection.close()
+        # Процесс пула может простаивать долго: значения нужны сразу.
+        metrics.registry.flush()
+
+
+def schedule_thumbnails(post):
+    """Ставит обработку картинки поста в фоновую очередь после коммита.
+
+    Pillow упирается в процессор, поэтому картинки обрабатывает пул
+    процессов, а не потоков. При THUMBNAIL_WORKERS = 0 картинка
+    обрабатывается сразу после коммита, в том же запросе.
+    """
+    global _executor
+    post_id = post.pk
+    if not settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: _process_safely(post_id))
+        return
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            initializer=_init_worker,
+        )
+    transaction.on_commit(
+        lambda: _executor.submit(_process_in_background, post_id))
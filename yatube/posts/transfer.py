@@ -0,0 +1,296 @@
+import gzip
+import io
+import json
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from .cache import bump_feed_version
+from .feed import backfill_feed
+from .models import Comment, Follow, Group, Post, User
+from .stats import recount_stats
+
+TRANSFER_BATCH_SIZE = 1000
+
+
+@contextmanager
+def open_stream(path, mode, compress=None):
+    """Открывает файл JSON Lines; ``-`` — стандартный ввод или вывод.
+
+    Файлы с расширением .gz сжимаются gzip, если ``compress`` не задан.
+    """
+    if compress is None:
+        compress = path.endswith('.gz')
+    if path == '-':
+        raw = sys.stdin.buffer if mode == 'r' else sys.stdout.buffer
+    else:
+        raw = open(path, f'{mode}b')
+    fileobj = gzip.GzipFile(fileobj=raw, mode=f'{mode}b') if compress else raw
+    stream = io.TextIOWrapper(fileobj, encoding='utf-8')
+    try:
+        yield stream
+    finally:
+        # Обёртку отцепляем, чтобы она не закрыла стандартный поток.
+        stream.detach()
+        if compress:
+            fileobj.close()
+        if path != '-':
+            raw.close()
+
+
+def export_rows(chunk_size=TRANSFER_BATCH_SIZE):
+    """Выдаёт записи для выгрузки по одной, читая базу порциями.
+
+    Модели идут в порядке зависимостей: пользователи, группы, посты,
+    комментарии, подписки. Связи с пользователями и группами хранятся
+    по имени и slug, с постами — по id из исходной базы.
+    """
+    users = User.objects.order_by('pk').values(
+        'username', 'first_name', 'last_name')
+    for row in users.iterator(chunk_size=chunk_size):
+        yield {'model': 'user', **row}
+    groups = Group.objects.order_by('pk').values(
+        'title', 'slug', 'description')
+    for row in groups.iterator(chunk_size=chunk_size):
+        yield {'model': 'group', **row}
+    posts = Post.objects.order_by('pk').values_list(
+        'pk', 'author__username', 'group__slug', 'text', 'image',
+        'pub_date', 'updated')
+    for pk, author, group, text, image, pub_date, updated in posts.iterator(
+            chunk_size=chunk_size):
+        yield {
+            'model': 'post', 'id': pk, 'author': author, 'group': group,
+            'text': text, 'image': image, 'pub_date': pub_date.isoformat(),
+            'updated': updated.isoformat(),
+        }
+    comments = Comment.objects.order_by('pk').values_list(
+        'pk', 'post_id', 'author__username', 'text', 'created')
+    for pk, post, author, text, created in comments.iterator(
+            chunk_size=chunk_size):
+        yield {
+            'model': 'comment', 'id': pk, 'post': post, 'author': author,
+            'text': text, 'created': created.isoformat(),
+        }
+    follows = Follow.objects.order_by('pk').values_list(
+        'user__username', 'author__username')
+    for user, author in follows.iterator(chunk_size=chunk_size):
+        yield {'model': 'follow', 'user': user, 'author': author}
+
+
+def export_posts(stream, chunk_size=TRANSFER_BATCH_SIZE):
+    """Пишет выгрузку в поток построчно; возвращает число строк по моделям."""
+    counts = Counter()
+    for row in export_rows(chunk_size):
+        stream.write(json.dumps(row, ensure_ascii=False))
+        stream.write('\n')
+        counts[row['model']] += 1
+    return counts
+
+
+def format_report(action, counts, elapsed):
+    """Строка отчёта: число строк по моделям и скорость."""
+    total = sum(counts.values())
+    details = ', '.join(f'{model}: {count}' for model, count in counts.items())
+    return (f'{action} {total} строк за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-6):.0f} строк/с). {details}')
+
+
+@contextmanager
+def keep_dates(*fields):
+    """Не даёт auto_now и auto_now_add затереть даты из выгрузки.
+
+    Флаги полей общие для процесса, поэтому менять их можно только
+    в отдельной команде, а не в обработчике запроса.
+    """
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class PostImporter:
+    """Загружает выгрузку export_posts пачками через bulk_create.
+
+    Посты и комментарии получают новые id: они выдаются заранее после
+    максимального id в базе, а соответствие старых и новых id хранится
+    в памяти, чтобы перевесить на новые посты комментарии. Пользователи
+    и группы сопоставляются по имени и slug; недостающие создаются.
+    Сигналы при bulk_create не срабатывают, поэтому ленты подписок,
+    счётчики и версия кеша обновляются в конце, в ``finish()``.
+    Пачка делится на INSERT'ы самим Django: SQLite ограничивает число
+    строк и параметров в одном запросе.
+    """
+
+    def __init__(self, batch_size=TRANSFER_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.users = {}
+        self.groups = {}
+        self.post_ids = {}
+        self.counts = Counter()
+        self.pending_model = None
+        self.pending = []
+        self.next_post_id = self._max_pk(Post) + 1
+        self.next_comment_id = self._max_pk(Comment) + 1
+        self.feed_authors = set()
+        self.feed_pairs = set()
+
+    @staticmethod
+    def _max_pk(model):
+        return model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+
+    def add(self, row):
+        """Принимает очередную запись выгрузки."""
+        model = row['model']
+        if model not in self.loaders:
+            raise ValueError(f'Неизвестная модель в выгрузке: {model}')
+        if model != self.pending_model or len(self.pending) >= (
+                self.batch_size):
+            self.flush()
+            self.pending_model = model
+        self.pending.append(row)
+
+    def flush(self):
+        """Записывает накопленную пачку записей одной модели."""
+        if self.pending:
+            self.loaders[self.pending_model](self, self.pending)
+            self.counts[self.pending_model] += len(self.pending)
+        self.pending = []
+
+    def finish(self):
+        """Дописывает остаток и пересчитывает производные данные."""
+        self.flush()
+        pairs = set(self.feed_pairs)
+        pairs.update(Follow.objects.filter(
+            author_id__in=self.feed_authors).values_list('user_id',
+                                                         'author_id'))
+        for user_id, author_id in pairs:
+            backfill_feed(user_id, author_id)
+        user_ids = list(self.users.values())
+        for start in range(0, len(user_ids), self.batch_size):
+            recount_stats(user_ids[start:start + self.batch_size])
+        transaction.on_commit(bump_feed_version)
+        return self.counts
+
+    def resolve_users(self, usernames):
+        """Находит id пользователей по именам, создавая недостающих."""
+        missing = {name for name in usernames if name not in self.users}
+        if not missing:
+            return
+        self.users.update(User.objects.filter(
+            username__in=missing).values_list('username', 'pk'))
+        self._create_users([
+            {'username': name} for name in missing - self.users.keys()])
+
+    def _create_users(self, rows):
+        if not rows:
+            return
+        # Пароли не выгружаются: новые пользователи входят через сброс.
+        password = make_password(None)
+        User.objects.bulk_create(
+            (User(username=row['username'],
+                  first_name=row.get('first_name', ''),
+                  last_name=row.get('last_name', ''),
+                  password=password)
+             for row in rows),
+        )
+        self.users.update(User.objects.filter(
+            username__in=[row['username'] for row in rows],
+        ).values_list('username', 'pk'))
+
+    def load_users(self, rows):
+        self.users.update(User.objects.filter(
+            username__in=[row['username'] for row in rows],
+        ).values_list('username', 'pk'))
+        self._create_users(
+            [row for row in rows if row['username'] not in self.users])
+
+    def load_groups(self, rows):
+        rows = {row['slug']: row for row in rows}
+        self.groups.update(Group.objects.filter(
+            slug__in=rows).values_list('slug', 'pk'))
+        Group.objects.bulk_create(
+            (Group(title=row['title'], slug=slug,
+                   description=row['description'])
+             for slug, row in rows.items() if slug not in self.groups),
+        )
+        self.groups.update(Group.objects.filter(
+            slug__in=rows).values_list('slug', 'pk'))
+
+    def load_posts(self, rows):
+        self.resolve_users(row['author'] for row in rows)
+        posts = []
+        for row in rows:
+            self.post_ids[row['id']] = self.next_post_id
+            author_id = self.users[row['author']]
+            posts.append(Post(
+                pk=self.next_post_id,
+                author_id=author_id,
+                group_id=self.groups.get(row['group']),
+                text=row['text'],
+                image=row['image'],
+                pub_date=parse_datetime(row['pub_date']),
+                updated=parse_datetime(row['updated']),
+            ))
+            self.feed_authors.add(author_id)
+            self.next_post_id += 1
+        with keep_dates(Post._meta.get_field('pub_date'),
+                        Post._meta.get_field('updated')):
+            Post.objects.bulk_create(posts)
+
+    def load_comments(self, rows):
+        self.resolve_users(row['author'] for row in rows)
+        comments = []
+        for row in rows:
+            post_id = self.post_ids.get(row['post'])
+            if post_id is None:
+                continue
+            comments.append(Comment(
+                pk=self.next_comment_id,
+                post_id=post_id,
+                author_id=self.users[row['author']],
+                text=row['text'],
+                created=parse_datetime(row['created']),
+            ))
+            self.next_comment_id += 1
+        with keep_dates(Comment._meta.get_field('created')):
+            Comment.objects.bulk_create(comments)
+
+    def load_follows(self, rows):
+        self.resolve_users(
+            name for row in rows for name in (row['user'], row['author']))
+        follows = []
+        for row in rows:
+            pair = (self.users[row['user']], self.users[row['author']])
+            if pair[0] == pair[1]:
+                continue
+            follows.append(Follow(user_id=pair[0], author_id=pair[1]))
+            self.feed_pairs.add(pair)
+        Follow.objects.bulk_create(
+            follows, ignore_conflicts=True)
+
+    loaders = {
+        'user': load_users,
+        'group': load_groups,
+        'post': load_posts,
+        'comment': load_comments,
+        'follow': load_follows,
+    }
+
+
+def import_posts(stream, batch_size=TRANSFER_BATCH_SIZE):
+    """Загружает выгрузку из потока одной транзакцией."""
+    with transaction.atomic():
+        importer = PostImporter(batch_size)
+        for line in stream:
+            if line.strip():
+                importer.add(json.loads(line))
+        return importer.finish()
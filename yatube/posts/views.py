@@ -1,35 +1,59 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db.models import prefetch_related_objects
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
-from .forms import PostForm, CommentForm
-from .models import Group, Follow, Post, User
+from core.routers import read_from_replica
+from core.writes import queued_write
+
+from .cache import versioned_cache_page
+from .conditional import (conditional_page, group_state, page_object,
+                          post_state, profile_state)
+from .forms import CommentForm, PostForm, SearchForm
+from .models import Follow, Post, PostQuerySet, Recommendation, User
+from .paginators import CursorPaginator, WindowPaginator
+from .search import search_posts
+from .stats import get_stats
+from .thumbnails import schedule_thumbnails
 
 
 SYMBOLS_FOR_TITLE = 100
+FOLLOW_FEED_CURSOR = ('feed_pub_date', 'feed_item_id')
 
 
-def paginator(request, post_list):
-    func_paginator = Paginator(post_list, settings.AMOUNT_OF_POSTS)
+def paginator(request, post_list, cursor_keys=None):
     page_number = request.GET.get('page')
+    if page_number is None:
+        func_paginator = CursorPaginator(
+            post_list,
+            settings.AMOUNT_OF_POSTS,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            keys=cursor_keys,
+        )
+    else:
+        func_paginator = WindowPaginator(
+            post_list, settings.AMOUNT_OF_POSTS)
     page_obj = func_paginator.get_page(page_number)
     return page_obj
 
 
-@cache_page(20, key_prefix='index_page')
+@read_from_replica
+@versioned_cache_page(
+    settings.INDEX_PAGE_CACHE_TIMEOUT, key_prefix='index_page')
 def index(request):
     """Главная страница."""
-    post_list = Post.objects.all()
+    post_list = Post.objects.for_feed()
     page_obj = paginator(request, post_list)
     return render(request, 'posts/index.html', {'page_obj': page_obj})
 
 
+@read_from_replica
+@conditional_page(group_state)
 def group_posts(request, slug):
     """Страница сообщества."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('group', 'author').all()
+    group = page_object(request)
+    post_list = Post.objects.for_feed().filter(group=group)
     page_obj = paginator(request, post_list)
     return render(
         request,
@@ -38,26 +62,30 @@ def group_posts(request, slug):
     )
 
 
+@read_from_replica
+@conditional_page(profile_state)
 def profile(request, username):
     """Профиль пользователя."""
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    count = posts.count()
+    author = page_object(request)
+    posts = Post.objects.for_feed().filter(author=author)
+    stats = get_stats(author)
     page_obj = paginator(request, posts)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author=author).exists()
+    following = author.is_followed
     context = {
         'author': author,
         'page_obj': page_obj,
-        'count': count,
+        'count': stats.posts_count,
+        'stats': stats,
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@conditional_page(post_state)
 def post_detail(request, post_id):
     """Страница конкретного поста."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = page_object(request)
+    prefetch_related_objects([post], *PostQuerySet.detail_prefetch())
     comment = post.comments.all()
     form = CommentForm(request.POST or None)
     context = {
@@ -68,6 +96,33 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@read_from_replica
+def search(request):
+    """Поиск постов по тексту."""
+    form = SearchForm(request.GET)
+    form.is_valid()
+    query = form.cleaned_data.get('q')
+    posts, next_cursor = search_posts(
+        query,
+        settings.AMOUNT_OF_POSTS,
+        group=form.cleaned_data.get('group'),
+        author=form.cleaned_data.get('author'),
+        after=request.GET.get('after'),
+    )
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['after'] = next_cursor
+        next_query = params.urlencode()
+    context = {
+        'form': form,
+        'query': query,
+        'posts': posts,
+        'next_query': next_query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
     """Создает новый пост."""
@@ -80,6 +135,8 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        schedule_thumbnails(post)
     return redirect('posts:profile', request.user)
 
 
@@ -96,7 +153,9 @@ def post_edit(request, post_id):
         instance=post,
     )
     if form.is_valid():
-        form.save()
+        post = form.save()
+        if 'image' in form.changed_data and post.image:
+            schedule_thumbnails(post)
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'form': form,
@@ -115,18 +174,23 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        queued_write(comment.save)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@read_from_replica
 @login_required
 def follow_index(request):
     """Информация о текущем пользователе доступна в переменной request.user"""
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator(request, post_list)
+    page_obj = paginator(
+        request, Post.objects.for_follow_feed(request.user),
+        cursor_keys=FOLLOW_FEED_CURSOR)
+    recommendations = Recommendation.objects.filter(
+        user=request.user).select_related('author')
     context = {
         'page_obj': page_obj,
-        'follow': True
+        'follow': True,
+        'recommendations': recommendations[:settings.RECOMMENDATIONS_SHOWN],
     }
     return render(request, 'posts/follow.html', context)
 
@@ -136,7 +200,8 @@ def profile_follow(request, username):
     """Подписаться на автора"""
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        queued_write(
+            Follow.objects.get_or_create, user=request.user, author=author)
     return redirect('posts:follow_index')
 
 
@@ -144,5 +209,6 @@ def profile_follow(request, username):
 def profile_unfollow(request, username):
     """Отписаться от автора"""
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(author=author, user=request.user).delete()
+    queued_write(
+        Follow.objects.filter(author=author, user=request.user).delete)
     return redirect('posts:profile', username)
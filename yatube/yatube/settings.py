@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -46,12 +47,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.middleware.RepeatedQueriesMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.WriteTimeoutMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
@@ -61,7 +67,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -86,7 +92,40 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        # Соединение живёт между запросами, PRAGMA выставляются один раз
+        'CONN_MAX_AGE': 60,
+    },
+    # Локальная реплика: копия основной базы, которую обновляет
+    # manage.py sync_replicas. Читается, только если указана
+    # в REPLICA_DATABASES.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+# Ленты читаются с реплик, запись идёт в основную базу (core.routers).
+# После записи пользователь REPLICA_STICKY_SECONDS секунд читает
+# из основной базы и видит свои изменения
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_DATABASES = []
+REPLICA_STICKY_SECONDS = 10
+
+# Выставляются каждому новому соединению с SQLite (core.db).
+# WAL позволяет читать во время записи, а busy_timeout заставляет
+# писателя ждать освобождения базы вместо "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в килобайтах
+    'cache_size': -64 * 1024,
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -142,6 +181,11 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 # Количество постов на странице
 AMOUNT_OF_POSTS = 10
 
+# Число постов в ленте кешируется и пересчитывается в фоне
+PAGINATOR_COUNT_IN_BACKGROUND = True
+PAGINATOR_COUNT_TTL = 60
+PAGINATOR_COUNT_TIMEOUT = 60 * 60
+
 ALLOWED_HOSTS = [
     'www.nrthbnd.pythonanywhere.com',
     'nrthbnd.pythonanywhere.com',
@@ -153,10 +197,93 @@ ALLOWED_HOSTS = [
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Главная страница сбрасывается при изменении постов и групп,
+# поэтому её можно хранить долго
+INDEX_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Карточки постов в лентах; ключ меняется при редактировании поста
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Подписки пользователя (posts.follow_graph); сбрасываются при подписке
+# и отписке
+FOLLOWING_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сколько рекомендаций «Кого почитать» показывать в ленте подписок;
+# сами рекомендации считает команда recommend_follows
+RECOMMENDATIONS_SHOWN = 5
+
+# Процессы для фоновой обработки загруженных картинок; 0 — обрабатывать
+# сразу после коммита. Тесты ставят 0 (core.test_runner).
+THUMBNAIL_WORKERS = 2
+
+# Комментарии и подписки пишутся пачками из одного потока (core.writes).
+# Тесты выключают очередь (core.test_runner): записи выполняются сразу
+WRITE_QUEUE = True
+WRITE_QUEUE_INTERVAL = 0.02
+WRITE_QUEUE_BATCH_SIZE = 100
+WRITE_QUEUE_TIMEOUT = 30
+# Через сколько секунд повторить запись, отменённую по таймауту
+WRITE_QUEUE_RETRY_AFTER = 5
+
+# L1 — LRU в памяти процесса, L2 — общий для всех процессов кеш
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 5,
+            # Версия лент и подписки сбрасываются в одном процессе,
+            # а читаются во всех
+            'L1_SKIP_PREFIXES': ['feed_version', 'following:'],
+            'STALE_TIMEOUT': 60,
+            'LOCK_TIMEOUT': 5,
+            'LOCK_WAIT': 0.5,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube_cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Поиск повторяющихся (N+1) запросов
+QUERY_REPEAT_DETECTION = DEBUG
+QUERY_REPEAT_THRESHOLD = 5
+QUERY_REPEAT_RAISE = False
+
+# Заголовок Server-Timing и строка лога core.timing на каждый запрос
+SERVER_TIMING = True
+THUMBNAIL_BACKEND = 'core.timing.TimedThumbnailBackend'
+
+# Метрики для Prometheus: каждый процесс сбрасывает свои значения
+# в METRICS_DIR, страница /metrics складывает их
+METRICS_DIR = os.path.join(tempfile.gettempdir(), 'yatube_metrics')
+METRICS_FLUSH_INTERVAL = 5
+METRICS_ALLOWED_IPS = [
+    '127.0.0.1',
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 INTERNAL_IPS = [